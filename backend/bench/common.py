@@ -0,0 +1,33 @@
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'src')
+
+# Base separada da de desenvolvimento (src/instance/pecanozap.db)
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(BENCH_DIR, 'bench.db')
+
+# Termos de busca que existem nos nomes gerados (ver generate.NAME_PREFIXES / NAME_WORDS)
+SEARCH_TERMS = (
+    'farmacia', 'auto pecas', 'padaria central', 'oficina', 'mercado bom preco',
+    'pizzaria', 'sao joao', 'estrela', 'otica', 'pet shop litoral'
+)
+
+
+def load_app(database_url=None):
+    """Importa main apontando para a base de benchmark (DATABASE_URL precisa existir antes do import)"""
+    os.environ['DATABASE_URL'] = database_url or os.environ.get('DATABASE_URL') or DEFAULT_DATABASE_URL
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    import main
+    return main
+
+
+def zipf_weights(count, skew):
+    """Pesos acumulados 1/rank^skew: poucos itens concentram a maior parte das escolhas"""
+    total = 0.0
+    cumulative = []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** skew
+        cumulative.append(total)
+    return cumulative
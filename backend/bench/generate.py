@@ -0,0 +1,187 @@
+"""Gera uma base sintética para os benchmarks: cidades, categorias, estabelecimentos e avaliações
+
+    python bench/generate.py --businesses 100000 --reviews 1000000
+    python bench/generate.py --database-url postgresql://localhost/pecanozap_bench ...   (com DATABASE_SSLMODE=disable)
+
+Estabelecimentos entram pelo mesmo caminho da importação em lote (import_businesses)
+e avaliações em lotes (COPY no PostgreSQL). A distribuição é enviesada como na vida
+real: poucas cidades concentram a maioria dos estabelecimentos e poucos
+estabelecimentos concentram a maioria das avaliações (Zipf, --skew).
+"""
+import bisect
+import csv
+import datetime
+import io
+import itertools
+import random
+import time
+
+import click
+
+from common import DEFAULT_DATABASE_URL, load_app, zipf_weights
+
+CITIES = (
+    ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'), ('Salvador', 'BA'),
+    ('Brasília', 'DF'), ('Fortaleza', 'CE'), ('Recife', 'PE'), ('Porto Alegre', 'RS'), ('Curitiba', 'PR'),
+    ('Goiânia', 'GO'), ('Ubatuba', 'SP'), ('Caraguatatuba', 'SP'), ('São Sebastião', 'SP'), ('Ilhabela', 'SP'),
+    ('Taubaté', 'SP'), ('São José dos Campos', 'SP'), ('Campinas', 'SP'), ('Santos', 'SP'), ('Paraty', 'RJ'),
+    ('Niterói', 'RJ'), ('Florianópolis', 'SC'), ('Joinville', 'SC'), ('Manaus', 'AM'), ('Belém', 'PA')
+)
+STATES = ('SP', 'RJ', 'MG', 'BA', 'PR', 'RS', 'SC', 'GO', 'PE', 'CE')
+NAME_PREFIXES = (
+    'Auto Peças', 'Farmácia', 'Mercado', 'Padaria', 'Oficina', 'Salão', 'Clínica', 'Escola', 'Loja',
+    'Restaurante', 'Pizzaria', 'Açougue', 'Papelaria', 'Ótica', 'Pet Shop'
+)
+NAME_WORDS = (
+    'São João', 'Central', 'Bom Preço', 'Estrela', 'Litoral', 'Avenida', 'do Povo', 'Santa Rita',
+    'Nova Era', 'Primavera', 'Itaguá', 'Perequê', 'Boa Vista', 'Paraíso', 'Maré Alta'
+)
+FIRST_NAMES = ('Ana', 'João', 'Maria', 'José', 'Carla', 'Pedro', 'Juliana', 'Lucas', 'Fernanda', 'Rafael')
+COMMENTS = (
+    'Ótimo atendimento!', 'Preço justo e entrega rápida.', 'Recomendo.', 'Demorou um pouco, mas resolveu.',
+    'Não gostei do atendimento.', None, None
+)
+RATING_CUMULATIVE = list(itertools.accumulate((5, 7, 13, 30, 45)))  # pesos de 1 a 5 estrelas
+REVIEW_COLUMNS = ('customer_name', 'customer_email', 'rating', 'comment', 'is_approved', 'created_at', 'business_id')
+
+
+def weighted_choice(rng, items, cumulative):
+    return items[bisect.bisect_left(cumulative, rng.random() * cumulative[-1])]
+
+
+def ensure_reference_data(main, rng, city_count):
+    """Cidades reais da lista + "Cidade N" até city_count; categorias iniciais do app"""
+    main.create_initial_data()
+    existing = {(name, state) for name, state in main.db.session.query(main.City.name, main.City.state)}
+    wanted = list(CITIES) + [(f'Cidade {n}', rng.choice(STATES)) for n in range(len(CITIES) + 1, city_count + 1)]
+    for name, state in wanted[:city_count]:
+        if (name, state) not in existing:
+            main.db.session.add(main.City(name=name, state=state))
+    main.db.session.commit()
+
+    cities = main.db.session.query(main.City.name, main.City.state).order_by(main.City.id).all()
+    categories = [name for (name,) in main.db.session.query(main.Category.name).order_by(main.Category.id)]
+    return cities, categories
+
+
+def business_records(rng, count, cities, categories, skew):
+    """Registros no formato da importação; cidades e categorias também seguem Zipf"""
+    city_weights = zipf_weights(len(cities), skew)
+    category_weights = zipf_weights(len(categories), skew * 0.7)
+    centers = {city: (rng.uniform(-30, -3), rng.uniform(-55, -35)) for city in cities}
+    for n in range(1, count + 1):
+        city, state = weighted_choice(rng, cities, city_weights)
+        latitude, longitude = centers[(city, state)]
+        phone = f'{rng.randint(11, 99)}9{rng.randint(10000000, 99999999)}'
+        yield {
+            'email': f'bench{n}@exemplo.com',
+            'business_name': f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_WORDS)} {n}',
+            'owner_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(NAME_WORDS)}',
+            'city': city,
+            'state': state,
+            'category': weighted_choice(rng, categories, category_weights),
+            'phone': phone,
+            'whatsapp': phone,
+            'address': f'Rua {rng.choice(NAME_WORDS)}, {rng.randint(1, 3000)}',
+            'description': f'{rng.choice(NAME_PREFIXES)} com {rng.choice(("entrega", "estacionamento", "cartão", "pix"))}',
+            'latitude': round(latitude + rng.gauss(0, 0.05), 6),
+            'longitude': round(longitude + rng.gauss(0, 0.05), 6)
+        }
+
+
+def spread_created_at(main, rng, business_ids, days, batch_size):
+    """A importação grava o mesmo created_at em todos; espalha pelos últimos `days` dias"""
+    now = datetime.datetime.utcnow()
+    statement = main.User.__table__.update().where(main.User.id == main.db.bindparam('b_id')).values(
+        created_at=main.db.bindparam('b_created_at')
+    )
+    for start in range(0, len(business_ids), batch_size):
+        main.db.session.execute(statement, [
+            {'b_id': business_id, 'b_created_at': now - datetime.timedelta(seconds=rng.uniform(0, days * 86400))}
+            for business_id in business_ids[start:start + batch_size]
+        ])
+        main.db.session.commit()
+
+
+def review_rows(rng, count, business_ids, skew, days):
+    popularity = business_ids[:]
+    rng.shuffle(popularity)  # os populares não são os primeiros ids
+    weights = zipf_weights(len(popularity), skew)
+    now = datetime.datetime.utcnow()
+    for n in range(count):
+        name = rng.choice(FIRST_NAMES)
+        yield {
+            'customer_name': name,
+            'customer_email': f'{name.lower()}{n}@cliente.com' if rng.random() < 0.6 else None,
+            'rating': weighted_choice(rng, (1, 2, 3, 4, 5), RATING_CUMULATIVE),
+            'comment': rng.choice(COMMENTS),
+            'is_approved': rng.random() < 0.9,
+            'created_at': now - datetime.timedelta(seconds=rng.uniform(0, days * 86400)),
+            'business_id': weighted_choice(rng, popularity, weights)
+        }
+
+
+def insert_reviews(main, rows):
+    """Insere um lote de avaliações (COPY no PostgreSQL, executemany nos demais)"""
+    if main.db.engine.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([main.export_value(row[column]) for column in REVIEW_COLUMNS])
+        buffer.seek(0)
+        cursor = main.db.session.connection().connection.dbapi_connection.cursor()
+        cursor.copy_expert(f"COPY reviews ({', '.join(REVIEW_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    else:
+        main.db.session.execute(main.Review.__table__.insert(), rows)
+    main.db.session.commit()
+
+
+@click.command()
+@click.option('--database-url', default=None, help=f'Padrão: DATABASE_URL ou {DEFAULT_DATABASE_URL}')
+@click.option('--businesses', default=100_000, show_default=True)
+@click.option('--reviews', default=1_000_000, show_default=True)
+@click.option('--cities', default=200, show_default=True)
+@click.option('--skew', default=1.1, show_default=True, help='Expoente Zipf (maior = mais concentrado)')
+@click.option('--days', default=730, show_default=True, help='Janela de created_at')
+@click.option('--batch-size', default=10_000, show_default=True)
+@click.option('--seed', default=42, show_default=True)
+@click.option('--force', is_flag=True, help='Gera mesmo se a base já tiver estabelecimentos')
+def generate(database_url, businesses, reviews, cities, skew, days, batch_size, seed, force):
+    main = load_app(database_url)
+    rng = random.Random(seed)
+
+    with main.app.app_context():
+        main.upgrade_database()
+        if not force and main.db.session.query(main.User.id).first():
+            raise click.ClickException('A base já tem estabelecimentos; use --force ou outra --database-url')
+
+        started = time.perf_counter()
+        city_names, categories = ensure_reference_data(main, rng, cities)
+        print(f"🏙️ {len(city_names)} cidades, {len(categories)} categorias")
+
+        report = main.import_businesses(business_records(rng, businesses, city_names, categories, skew), batch_size)
+        print(f"🏪 {report.inserted} estabelecimentos em {report.elapsed:.1f}s ({report.error_count} com erro)")
+
+        business_ids = [business_id for (business_id,) in main.db.session.query(main.User.id).order_by(main.User.id)]
+        spread_created_at(main, rng, business_ids, days, batch_size)
+
+        step = time.perf_counter()
+        batch = []
+        for row in review_rows(rng, reviews, business_ids, skew, days):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                insert_reviews(main, batch)
+                batch = []
+        if batch:
+            insert_reviews(main, batch)
+        print(f"⭐ {reviews} avaliações em {time.perf_counter() - step:.1f}s")
+
+        main.rebuild_rating_aggregates()
+        main.mark_changed('reviews')
+        main.db.session.execute(main.db.text('ANALYZE'))
+        main.db.session.commit()
+        print(f"✅ Base gerada em {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    generate()
@@ -0,0 +1,218 @@
+"""Mede latência (p50/p95/p99), queries por requisição e vazão das rotas principais
+
+    python bench/run.py                                   # Flask test client na base de bench/generate.py
+    python bench/run.py --database-url postgresql://localhost/pecanozap_bench
+    python bench/run.py --url http://localhost:5000 --concurrency 8   # servidor local (SERVER_TIMING=1)
+
+Queries e tempo de banco vêm do header Server-Timing (instrumentação SQL do app):
+no test client ele é ligado aqui; contra um servidor, suba-o com SERVER_TIMING=1
+ou em modo debug. Cenários e ids sorteados dependem só de --seed, então duas
+execuções com a mesma base e a mesma seed fazem as mesmas requisições.
+"""
+import http.client
+import json
+import platform
+import random
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from common import DEFAULT_DATABASE_URL, SEARCH_TERMS, load_app
+
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class TestClientTarget:
+    """Requisições pelo Flask test client, no mesmo processo (um client por thread)"""
+
+    def __init__(self, database_url, cold=False):
+        self.main = load_app(database_url)
+        self.main.app.config['SERVER_TIMING'] = True
+        self.cold = cold
+        self._local = threading.local()
+        with self.main.app.app_context():
+            self.database = self.main.db.engine.dialect.name
+            self.admin_token = self.main.token_signer.issue(999, 'admin')
+            # Os mais avaliados (cauda pesada do Zipf); pela API não há ordenação por quantidade de avaliações
+            self.popular = [business_id for (business_id,) in self.main.db.session.query(self.main.User.id)
+                            .order_by(self.main.User.rating_count.desc()).limit(20)]
+
+    def request(self, path, headers):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.main.app.test_client()
+        if self.cold:
+            # Sem os caches de resposta/dashboard: mede o caminho completo até o banco
+            self.main.response_cache.invalidate()
+            self.main.dashboard_cache.invalidate()
+        response = client.get(path, headers=headers)
+        return response.status_code, response.headers.get('Server-Timing'), response.get_data()
+
+
+class HTTPTarget:
+    """Requisições HTTP com keep-alive (uma conexão por thread) contra um servidor já em execução"""
+
+    def __init__(self, url, admin_email, admin_password):
+        parsed = urllib.parse.urlsplit(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.database = 'servidor'
+        self.popular = None
+        self._local = threading.local()
+        status, _, body = self.request('/api/admin/login', {'Content-Type': 'application/json'}, method='POST',
+                                       body=json.dumps({'email': admin_email, 'password': admin_password}))
+        self.admin_token = json.loads(body)['token'] if status == 200 else None
+
+    def request(self, path, headers, method='GET', body=None):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            connection.close()  # reconecta na próxima
+            self._local.connection = None
+            raise
+        return response.status, response.getheader('Server-Timing'), response.read()
+
+
+def discover(target):
+    """Contagens das tabelas (para sortear ids e filtros), os mais bem avaliados e os mais avaliados
+
+    Contra um servidor não há como achar os mais avaliados pela API; eles viram os mais bem avaliados.
+    """
+    _, _, body = target.request('/api/test-db', {})
+    tables = json.loads(body)['tables']
+    _, _, body = target.request('/api/businesses?sort=rating&per_page=50&fields=id', {})
+    top_rated = [business['id'] for business in json.loads(body)['businesses']] or [1]
+    return tables, top_rated, target.popular or top_rated
+
+
+def scenarios(tables, top_rated, popular):
+    """Nome -> (função rng -> caminho, exige admin)"""
+    businesses, cities, categories = max(tables['users'], 1), max(tables['cities'], 1), max(tables['categories'], 1)
+    return {
+        'businesses_list': (lambda rng: f'/api/businesses?page={rng.randint(1, 5)}', False),
+        'businesses_filtered': (lambda rng: f'/api/businesses?city_id={rng.randint(1, min(cities, 20))}'
+                                            f'&category_id={rng.randint(1, categories)}', False),
+        'businesses_search': (lambda rng: '/api/businesses?search=' + urllib.parse.quote(rng.choice(SEARCH_TERMS)), False),
+        'businesses_sorted': (lambda rng: f'/api/businesses?sort=rating&page={rng.randint(1, 5)}', False),
+        'business_detail': (lambda rng: f'/api/businesses/{rng.randint(1, businesses)}', False),
+        'reviews_random': (lambda rng: f'/api/reviews/{rng.randint(1, businesses)}', False),
+        'reviews_top_rated': (lambda rng: f'/api/reviews/{rng.choice(top_rated)}', False),
+        'reviews_popular': (lambda rng: f'/api/reviews/{rng.choice(popular)}', False),
+        'admin_dashboard': (lambda rng: '/api/admin/dashboard', True),
+        'admin_users': (lambda rng: f'/api/admin/users?page={rng.randint(1, 5)}', True),
+        'admin_reviews': (lambda rng: f'/api/admin/reviews?page={rng.randint(1, 5)}', True),
+    }
+
+
+def percentile(values, fraction):
+    """Percentil por rank mais próximo (values já ordenado)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def run_scenario(target, make_path, headers, requests, warmup, concurrency, seed):
+    rng = random.Random(seed)
+    paths = [make_path(rng) for _ in range(warmup + requests)]
+    for path in paths[:warmup]:
+        target.request(path, headers)
+
+    def call(path):
+        started = time.perf_counter()
+        try:
+            status, timing, _ = target.request(path, headers)
+        except Exception:
+            return time.perf_counter() - started, 0, None
+        return time.perf_counter() - started, status, timing
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(call, paths[warmup:]))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(duration * 1000 for duration, _, _ in samples)
+    timings = [SERVER_TIMING.search(timing or '') for _, _, timing in samples]
+    timings = [(float(match.group(1)), int(match.group(2))) for match in timings if match]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, status, _ in samples if not 200 <= status < 400),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries_per_request': round(sum(queries for _, queries in timings) / len(timings), 2) if timings else None,
+        'db_ms_per_request': round(sum(db_ms for db_ms, _ in timings) / len(timings), 2) if timings else None,
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else 0.0
+    }
+
+
+def print_report(results):
+    header = f"{'cenário':<22}{'req':>6}{'erros':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>7}{'db ms':>8}{'req/s':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, result in results.items():
+        queries = result['queries_per_request']
+        db_ms = result['db_ms_per_request']
+        print(f"{name:<22}{result['requests']:>6}{result['errors']:>7}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{'-' if queries is None else queries:>7}{'-' if db_ms is None else db_ms:>8}"
+              f"{result['requests_per_second']:>9.1f}")
+
+
+@click.command()
+@click.option('--url', default=None, help='Servidor local (ex.: http://localhost:5000); sem ele usa o test client')
+@click.option('--database-url', default=None, help=f'Base do test client. Padrão: DATABASE_URL ou {DEFAULT_DATABASE_URL}')
+@click.option('--requests', 'request_count', default=200, show_default=True, help='Requisições medidas por cenário')
+@click.option('--warmup', default=20, show_default=True)
+@click.option('--concurrency', default=1, show_default=True)
+@click.option('--scenario', 'selected', multiple=True, help='Só estes cenários (repetível)')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--cold', is_flag=True, help='Test client: descarta os caches de resposta antes de cada requisição')
+@click.option('--admin-email', default='admin@pecanozap.com', show_default=True)
+@click.option('--admin-password', default='admin123', show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Grava os resultados em JSON')
+def run(url, database_url, request_count, warmup, concurrency, selected, seed, cold, admin_email, admin_password,
+        output):
+    if url and cold:
+        raise click.BadParameter('só funciona com o test client', param_hint='--cold')
+    target = HTTPTarget(url, admin_email, admin_password) if url else TestClientTarget(database_url, cold)
+    tables, top_rated, popular = discover(target)
+    available = scenarios(tables, top_rated, popular)
+    unknown = set(selected) - available.keys()
+    if unknown:
+        raise click.BadParameter(f"cenários desconhecidos: {', '.join(sorted(unknown))}", param_hint='--scenario')
+
+    print(f"🗄️ {target.database}: {tables['users']} estabelecimentos, {tables.get('reviews', '?')} avaliações")
+    results = {}
+    for index, (name, (make_path, admin)) in enumerate(available.items()):
+        if selected and name not in selected:
+            continue
+        if admin and not target.admin_token:
+            print(f"⚠️ {name}: sem token admin, ignorado")
+            continue
+        headers = {'Authorization': f'Bearer {target.admin_token}'} if admin else {}
+        results[name] = run_scenario(target, make_path, headers, request_count, warmup, concurrency, seed + index)
+
+    print_report(results)
+    if output:
+        with open(output, 'w') as file:
+            json.dump({
+                'database': target.database,
+                'tables': tables,
+                'python': platform.python_version(),
+                'requests': request_count,
+                'concurrency': concurrency,
+                'seed': seed,
+                'cold': cold,
+                'results': results
+            }, file, indent=2)
+        print(f"💾 Resultados em {output}")
+
+
+if __name__ == '__main__':
+    run()
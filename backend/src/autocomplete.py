@@ -0,0 +1,123 @@
+import threading
+from bisect import bisect_left, insort
+
+from search import fold
+
+
+def phrase_keys(name):
+    """Chaves de prefixo: o nome normalizado a partir de cada palavra ("sao paulo" -> ["sao paulo", "paulo"])"""
+    words = fold(name).split()
+    return sorted({' '.join(words[i:]) for i in range(len(words))})
+
+
+class PrefixIndex:
+    """Índice de prefixos em memória (lista ordenada + bisect) com top-k por score
+
+    Prefixos curtos (até `depth` caracteres) e faixas com mais de `scan_limit`
+    chaves têm o ranking guardado em _top, atualizado a cada inserção; as demais
+    consultas percorrem só a faixa do prefixo na lista ordenada.
+    """
+
+    def __init__(self, top_k=10, depth=2, scan_limit=256):
+        self.top_k = top_k
+        self.depth = depth
+        self.scan_limit = scan_limit
+        self._entries = []  # (chave, tipo, id), ordenada
+        self._items = {}    # (tipo, id) -> (score, dados, chaves)
+        self._top = {}      # prefixo -> {tipo: [(-score, id), ...]} (melhores primeiro)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def load(self, items):
+        """Carga em lote: items é um iterável de (tipo, id, nome, score, dados)"""
+        entries = []
+        records = {}
+        for kind, item_id, name, score, data in items:
+            keys = phrase_keys(name)
+            records[(kind, item_id)] = (score, data, keys)
+            entries.extend((key, kind, item_id) for key in keys)
+        entries.sort()
+
+        top = {}
+        for key, kind, item_id in entries:
+            score = records[(kind, item_id)][0]
+            for length in range(1, min(self.depth, len(key)) + 1):
+                self._offer(top.setdefault(key[:length], {}), kind, item_id, score)
+
+        with self._lock:
+            self._entries = entries
+            self._items = records
+            self._top = top
+
+    def add(self, kind, item_id, name, score=0, data=None):
+        """Insere ou atualiza um item"""
+        with self._lock:
+            self._discard(kind, item_id)
+            keys = phrase_keys(name)
+            self._items[(kind, item_id)] = (score, data, keys)
+            for key in keys:
+                entry = (key, kind, item_id)
+                self._entries.insert(bisect_left(self._entries, entry), entry)
+                for length in range(1, len(key) + 1):
+                    ranking = self._top.get(key[:length])
+                    if ranking is not None:
+                        self._offer(ranking, kind, item_id, score)
+
+    def remove(self, kind, item_id):
+        with self._lock:
+            self._discard(kind, item_id)
+
+    def _discard(self, kind, item_id):
+        record = self._items.pop((kind, item_id), None)
+        if record is None:
+            return
+        for key in record[2]:
+            index = bisect_left(self._entries, (key, kind, item_id))
+            if index < len(self._entries) and self._entries[index] == (key, kind, item_id):
+                del self._entries[index]
+            # Rankings que continham o item são recalculados na próxima consulta
+            for length in range(1, len(key) + 1):
+                ranking = self._top.get(key[:length])
+                if ranking is not None and any(entry[1] == item_id for entry in ranking.get(kind, ())):
+                    del self._top[key[:length]]
+
+    def _offer(self, ranking, kind, item_id, score):
+        entries = ranking.setdefault(kind, [])
+        if any(entry[1] == item_id for entry in entries):
+            return
+        entry = (-score, item_id)
+        if len(entries) < self.top_k or entry < entries[-1]:
+            insort(entries, entry)
+            del entries[self.top_k:]
+
+    def search(self, query, limit=5):
+        """Itens cujo nome (ou uma de suas palavras) começa com query, agrupados por tipo e ordenados por score"""
+        prefix = ' '.join(fold(query).split())
+        if not prefix:
+            return {}
+
+        with self._lock:
+            ranking = self._top.get(prefix) if limit <= self.top_k else None
+            if ranking is None:
+                ranking = self._scan(prefix, max(limit, self.top_k))
+
+            return {
+                kind: [self._items[(kind, item_id)][1] for _, item_id in entries[:limit]]
+                for kind, entries in ranking.items()
+            }
+
+    def _scan(self, prefix, limit):
+        lo = bisect_left(self._entries, (prefix,))
+        hi = bisect_left(self._entries, (prefix + '\uffff',))
+
+        ranking = {}
+        for _, kind, item_id in self._entries[lo:hi]:
+            entries = ranking.setdefault(kind, {})
+            entries[item_id] = (-self._items[(kind, item_id)][0], item_id)
+        ranking = {kind: sorted(entries.values())[:limit] for kind, entries in ranking.items()}
+
+        if hi - lo > self.scan_limit and limit == self.top_k:
+            self._top[prefix] = ranking
+        return ranking
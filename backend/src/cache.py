@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache em memória com expiração (TTL), limite de tamanho (LRU) e contadores de hit/miss"""
+
+    def __init__(self, ttl=60, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna o valor em cache ou None se ausente/expirado"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Armazena um valor, descartando o menos usado quando o limite é atingido"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Retorna o valor em cache ou calcula com factory() e armazena"""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys):
+        """Remove chaves específicas (ou todas, se nenhuma for informada)"""
+        with self._lock:
+            if not keys:
+                self._data.clear()
+                return
+            for key in keys:
+                self._data.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0
+        }
@@ -0,0 +1,151 @@
+import math
+import threading
+from bisect import bisect_left
+
+import geo
+
+MAX_PRECISION = 8
+
+
+def zoom_to_precision(zoom):
+    """Precisão do geohash para um zoom do mapa (células de ~64px ou maiores)"""
+    return max(1, min(MAX_PRECISION, 2 * (zoom + 2) // 5))
+
+
+class GridClusterIndex:
+    """Grade hierárquica de geohash em memória: um nível de agregados por precisão
+
+    Cada célula guarda [quantidade, soma das latitudes, soma das longitudes, id
+    do melhor avaliado], atualizada incrementalmente em add/remove.
+    """
+
+    def __init__(self, max_precision=MAX_PRECISION, max_cells=256):
+        self.max_precision = max_precision
+        self.max_cells = max_cells
+        self._points = {}  # id -> (latitude, longitude, geohash, score, dados)
+        self._hashes = []  # (geohash, id), ordenada
+        self._levels = [{} for _ in range(max_precision + 1)]
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def load(self, points):
+        """Carga em lote: points é um iterável de (id, latitude, longitude, score, dados)
+
+        A grade nova é montada fora do lock; consultas seguem na atual até a troca.
+        """
+        fresh = GridClusterIndex(self.max_precision, self.max_cells)
+        for item_id, latitude, longitude, score, data in points:
+            geohash = fresh._insert(item_id, latitude, longitude, score, data)
+            fresh._hashes.append((geohash, item_id))
+        fresh._hashes.sort()
+
+        with self._lock:
+            self._points = fresh._points
+            self._hashes = fresh._hashes
+            self._levels = fresh._levels
+
+    def add(self, item_id, latitude, longitude, score=0, data=None):
+        """Insere ou move um ponto"""
+        with self._lock:
+            self._discard(item_id)
+            geohash = self._insert(item_id, latitude, longitude, score, data)
+            self._hashes.insert(bisect_left(self._hashes, (geohash, item_id)), (geohash, item_id))
+
+    def remove(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _insert(self, item_id, latitude, longitude, score, data):
+        geohash = geo.encode(latitude, longitude, self.max_precision)
+        self._points[item_id] = (latitude, longitude, geohash, score, data)
+
+        for precision in range(1, self.max_precision + 1):
+            cell = self._levels[precision].setdefault(geohash[:precision], [0, 0.0, 0.0, None])
+            cell[0] += 1
+            cell[1] += latitude
+            cell[2] += longitude
+            if cell[3] is None or self._rank(item_id) > self._rank(cell[3]):
+                cell[3] = item_id
+        return geohash
+
+    def _discard(self, item_id):
+        point = self._points.pop(item_id, None)
+        if point is None:
+            return
+        latitude, longitude, geohash = point[:3]
+
+        index = bisect_left(self._hashes, (geohash, item_id))
+        if index < len(self._hashes) and self._hashes[index] == (geohash, item_id):
+            del self._hashes[index]
+
+        for precision in range(1, self.max_precision + 1):
+            key = geohash[:precision]
+            cell = self._levels[precision][key]
+            cell[0] -= 1
+            if cell[0] == 0:
+                del self._levels[precision][key]
+                continue
+            cell[1] -= latitude
+            cell[2] -= longitude
+            if cell[3] == item_id:
+                cell[3] = self._best(key)
+
+    def _rank(self, item_id):
+        return (self._points[item_id][3], -item_id)
+
+    def _best(self, prefix):
+        lo = bisect_left(self._hashes, (prefix,))
+        hi = bisect_left(self._hashes, (prefix + '~',))
+        return max((item_id for _, item_id in self._hashes[lo:hi]), key=self._rank, default=None)
+
+    def clusters(self, south, west, north, east, precision):
+        """Clusters (células não vazias) que intersectam o retângulo, na precisão pedida ou menor"""
+        with self._lock:
+            precision = min(precision, self.max_precision)
+            while precision > 1 and self._cell_count(south, west, north, east, precision) > self.max_cells:
+                precision -= 1
+
+            level = self._levels[precision]
+            if self._cell_count(south, west, north, east, precision) < len(level):
+                keys = self._cells_in_bbox(south, west, north, east, precision)
+            else:
+                keys = level.keys()
+
+            result = []
+            for key in keys:
+                cell = level.get(key)
+                if cell is None:
+                    continue
+                cell_south, cell_west, cell_north, cell_east = geo.bounds(key)
+                if cell_north < south or cell_south > north or cell_east < west or cell_west > east:
+                    continue
+                result.append({
+                    'geohash': key,
+                    'count': cell[0],
+                    'latitude': cell[1] / cell[0],
+                    'longitude': cell[2] / cell[0],
+                    'top_business': self._points[cell[3]][4]
+                })
+            return precision, result
+
+    def _cell_count(self, south, west, north, east, precision):
+        height, width = geo.cell_size(precision)
+        return (math.floor((north + 90) / height) - math.floor((south + 90) / height) + 1) * \
+            (math.floor((east + 180) / width) - math.floor((west + 180) / width) + 1)
+
+    def _cells_in_bbox(self, south, west, north, east, precision):
+        height, width = geo.cell_size(precision)
+        first_row = math.floor((south + 90) / height)
+        last_row = math.floor((north + 90) / height)
+        first_col = math.floor((west + 180) / width)
+        last_col = math.floor((east + 180) / width)
+
+        keys = set()
+        for row in range(first_row, last_row + 1):
+            latitude = min(-90 + (row + 0.5) * height, 90.0)
+            for col in range(first_col, last_col + 1):
+                longitude = min(-180 + (col + 0.5) * width, 180.0)
+                keys.add(geo.encode(latitude, longitude, precision))
+        return keys
@@ -0,0 +1,91 @@
+import gzip
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/csv', 'text/html', 'text/plain', 'text/css'
+}
+
+# Níveis para compressão a cada resposta (rápidos) e para respostas em cache (comprimidas uma vez só)
+LEVELS = {'br': 4, 'gzip': 6}
+CACHED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def available_encodings():
+    """Codificações suportadas, na ordem de preferência do servidor"""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def accepted_encoding(header, encodings=None):
+    """Melhor codificação aceita pelo cliente (Accept-Encoding com q-values) ou None"""
+    encodings = encodings or available_encodings()
+    weights = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name] = quality
+
+    best = None
+    for encoding in encodings:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def compress(data, encoding, level=None):
+    level = LEVELS[encoding] if level is None else level
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level=None):
+    """Comprime um iterável de blocos (str ou bytes), emitindo cada bloco já comprimido"""
+    level = LEVELS[encoding] if level is None else level
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            chunk = chunk.encode() if isinstance(chunk, str) else chunk
+            if chunk:
+                yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    for chunk in chunks:
+        chunk = chunk.encode() if isinstance(chunk, str) else chunk
+        if chunk:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+class CachedBody:
+    """Corpo de resposta em cache com suas versões comprimidas, geradas na primeira vez que são pedidas"""
+
+    def __init__(self, data, mimetype):
+        self.data = data
+        self.mimetype = mimetype
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        with self._lock:
+            body = self._variants.get(encoding)
+            if body is None:
+                body = self._variants[encoding] = compress(self.data, encoding, CACHED_LEVELS[encoding])
+            return body
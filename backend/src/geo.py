@@ -0,0 +1,104 @@
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+PRECISION = 9  # ~4.8m x 4.8m; prefixos menores formam a grade usada nas consultas
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Geohash do ponto (prefixos mais curtos = células maiores)"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+
+    return ''.join(chars)
+
+
+def bounds(geohash):
+    """Limites (sul, oeste, norte, leste) da célula do geohash"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def cell_size(precision):
+    """Altura e largura (em graus) de uma célula do geohash"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Distância em km entre dois pontos"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Prefixos de geohash cujas células (a do ponto + 8 vizinhas) cobrem o círculo do raio"""
+    km_per_lat = 111.32
+    km_per_lon = max(km_per_lat * math.cos(math.radians(latitude)), 0.01)
+
+    # Maior precisão cuja célula ainda é maior que o raio nas duas direções
+    precision = 1
+    for candidate in range(PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height * km_per_lat >= radius_km and width * km_per_lon >= radius_km:
+            precision = candidate
+            break
+
+    height, width = cell_size(precision)
+    cells = set()
+    for d_lat in (-height, 0, height):
+        for d_lon in (-width, 0, width):
+            lat = min(max(latitude + d_lat, -90.0), 90.0)
+            lon = (longitude + d_lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def cell_range(prefix):
+    """Intervalo [início, fim) de geohashes com o prefixo, para consultas por índice B-tree
+
+    O fim é o próximo prefixo do mesmo tamanho no alfabeto do geohash (só dígitos e
+    minúsculas, na mesma ordem em qualquer collation), não prefixo + um caractere
+    "alto": '~' vem antes das letras em collations como en_US.UTF-8 do PostgreSQL.
+    Sem próximo prefixo (só 'z'), fim é None: o intervalo vai até o último geohash.
+    """
+    stem = prefix.rstrip(BASE32[-1])
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + BASE32[BASE32.index(stem[-1]) + 1]
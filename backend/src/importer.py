@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from werkzeug.security import generate_password_hash
+
+from search import fold
+
+# Campos aceitos no arquivo de importação de estabelecimentos
+REQUIRED_FIELDS = ('email', 'business_name', 'owner_name', 'city', 'category')
+OPTIONAL_FIELDS = ('password', 'state', 'phone', 'whatsapp', 'address', 'description', 'latitude', 'longitude')
+
+
+def read_records(stream, file_format):
+    """Registros (dicts) de um arquivo CSV, JSON (lista) ou NDJSON"""
+    content = stream.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+
+    if file_format == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    if file_format == 'json':
+        records = json.loads(content)
+        if not isinstance(records, list):
+            raise ValueError('JSON deve ser uma lista de estabelecimentos')
+        return records
+    if file_format == 'ndjson':
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    raise ValueError('Formato deve ser csv, json ou ndjson')
+
+
+def detect_format(filename, default='csv'):
+    extension = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    return extension if extension in ('csv', 'json', 'ndjson') else default
+
+
+def name_key(name):
+    """Chave de comparação de nomes de cidade/categoria (sem acento, caixa e espaços extras)"""
+    return ' '.join(fold(name).split())
+
+
+def clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+# Registro sem senha: hash inutilizável (check_password_hash nunca confere com ele);
+# o acesso é definido depois, sem custo de hashing na importação
+UNUSABLE_PASSWORD = '!'
+
+
+def hash_passwords(passwords, method='scrypt', workers=None, hash_password=None):
+    """Gera os hashes preservando a ordem; None recebe UNUSABLE_PASSWORD
+
+    Sem hash_password, usa um pool de processos (só na linha de comando: num worker
+    web seria fork com threads e conexões abertas). Com ele (ex.: PasswordHasher.hash),
+    as senhas passam uma a uma por essa função.
+    """
+    hashes = [UNUSABLE_PASSWORD if password is None else None for password in passwords]
+    pending = [(index, password) for index, password in enumerate(passwords) if password is not None]
+    if hash_password is not None:
+        results = [hash_password(password) for _, password in pending]
+    elif len(pending) < 2:
+        results = [generate_password_hash(password, method) for _, password in pending]
+    else:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                partial(generate_password_hash, method=method), [password for _, password in pending],
+                chunksize=max(1, len(pending) // (workers * 4))
+            ))
+
+    for (index, _), password_hash in zip(pending, results):
+        hashes[index] = password_hash
+    return hashes
+
+
+class ImportReport:
+    """Resumo da importação (inseridos, ignorados, erros por linha e velocidade)"""
+
+    MAX_ERRORS = 100
+
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+        self.elapsed = 0.0
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({'row': row, 'error': message})
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'inserted': self.inserted,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.total / self.elapsed, 1) if self.elapsed else None
+        }
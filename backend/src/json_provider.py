@@ -0,0 +1,77 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele fica o json da biblioteca padrão
+    orjson = None
+
+
+def default(value):
+    """Tipos que o json padrão não serializa (datas em ISO 8601, como o orjson)"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f'Objeto do tipo {type(value).__name__} não é serializável em JSON')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """json da biblioteca padrão, compacto e sem ordenar chaves"""
+
+    name = 'json'
+    sort_keys = False
+    compact = True
+    ensure_ascii = False
+
+    @staticmethod
+    def default(value):
+        return default(value)
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('default', default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson: serializa datetime/date nativamente e gera bytes direto para a resposta"""
+
+    name = 'orjson'
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=default, option=self.options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+PROVIDERS = {'json': StdlibJSONProvider, 'orjson': OrjsonProvider}
+
+
+def provider_class(name='auto'):
+    """Classe do provider pedido; 'auto' usa orjson quando instalado"""
+    if name == 'auto':
+        name = 'orjson' if orjson else 'json'
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson, mas o orjson não está instalado')
+    return PROVIDERS[name]
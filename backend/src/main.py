@@ -2,15 +2,46 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+import base64
+import click
+import csv
 import datetime
+import io
+import json
+import operator
+import threading
+import time
+import types
+from collections import Counter
+
+from autocomplete import PrefixIndex
+from cache import TTLCache
+from clusters import GridClusterIndex, zoom_to_precision
+import compression
+import geo
+import importer
+import json_provider
+import migrations
+from passwords import PasswordHasher, PoolBusy
+from profiling import RequestProfiler
+from metrics import Metrics
+from search import build_document, tokenize
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import Pool, QueuePool
+import sqlstats
+from tokens import TokenError, TokenSigner, subject_key
 
 app = Flask(__name__)
 
+# Serialização JSON (JSON_PROVIDER=auto|orjson|json; auto usa orjson quando instalado)
+app.json = json_provider.provider_class(os.environ.get('JSON_PROVIDER', 'auto'))(app)
+
 # Configurações
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
@@ -21,7 +52,7 @@ if database_url:
     if database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-    print(f"🗄️ Conectando com PostgreSQL...")
+    print(f"🗄️ Conectando com {'PostgreSQL' if database_url.startswith('postgresql') else database_url.split(':')[0]}...")
     print(f"🔗 URL: {database_url[:30]}...")
 else:
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///pecanozap.db'
@@ -29,14 +60,35 @@ else:
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede o tempo para obter uma conexão (db_pool_wait_seconds)
+
+    Não há evento de pool antes da espera; connect() é o ponto de entrada público
+    (fila, criação da conexão e pre_ping).
+    """
+    
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            metrics.observe('db_pool_wait_seconds', (), time.perf_counter() - started)
+
+# Tamanho do pool explícito: pool_state calcula a exaustão a partir destes valores
+app.config['DATABASE_POOL_SIZE'] = int(os.environ.get('DATABASE_POOL_SIZE', 5))
+app.config['DATABASE_MAX_OVERFLOW'] = int(os.environ.get('DATABASE_MAX_OVERFLOW', 10))
+
 # Configurações adicionais para PostgreSQL
 app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'poolclass': TimedQueuePool,
+    'pool_size': app.config['DATABASE_POOL_SIZE'],
+    'max_overflow': app.config['DATABASE_MAX_OVERFLOW'],
     'pool_pre_ping': True,
     'pool_recycle': 300,
     'connect_args': {
         'connect_timeout': 10,
-        'sslmode': 'require'
-    } if database_url else {}
+        'sslmode': os.environ.get('DATABASE_SSLMODE', 'require')  # "disable" para um PostgreSQL local
+    } if database_url and database_url.startswith('postgresql') else {}
 }
 
 # Inicializar extensões
@@ -46,6 +98,77 @@ try:
 except Exception as e:
     print(f"❌ Erro ao inicializar SQLAlchemy: {e}")
 
+# Cache em memória para dados de referência (categorias e cidades)
+reference_cache = TTLCache(
+    ttl=int(os.environ.get('REFERENCE_CACHE_TTL', 60)),
+    maxsize=int(os.environ.get('REFERENCE_CACHE_SIZE', 128))
+)
+
+# Hashing de senha fora da thread da requisição, em pool limitado (503 quando a fila enche).
+# PASSWORD_HASH_METHOD aceita o formato do Werkzeug: "scrypt:65536:8:1", "pbkdf2:sha256:600000"...
+password_hasher = PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+    workers=int(os.environ.get('PASSWORD_POOL_WORKERS', 2)),
+    max_queue=int(os.environ.get('PASSWORD_POOL_QUEUE', 16))
+)
+# Senhas por importação via HTTP (cada uma passa pelo password_hasher; acima disso, use o CLI)
+app.config['IMPORT_MAX_PASSWORDS'] = int(os.environ.get('IMPORT_MAX_PASSWORDS', 100))
+
+# Tokens de acesso assinados (HMAC com SECRET_KEY), verificados sem consultar o banco
+token_signer = TokenSigner(
+    app.config['SECRET_KEY'],
+    ttl=int(os.environ.get('ACCESS_TOKEN_TTL', 7 * 86400)),
+    cache_size=int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+)
+
+# Estatísticas do dashboard admin: cache curto, descartado a cada escrita deste worker
+dashboard_cache = TTLCache(ttl=int(os.environ.get('DASHBOARD_CACHE_TTL', 30)), maxsize=16)
+
+# Resultado do ping ao banco usado pelos health checks (probes frequentes não viram uma query cada)
+health_cache = TTLCache(ttl=float(os.environ.get('HEALTH_PING_TTL', 5)), maxsize=4)
+
+# Índices em memória (autocomplete e clusters do mapa); reconstruídos quando outro worker altera os dados
+autocomplete_index = PrefixIndex()
+cluster_index = GridClusterIndex()
+app.config['MEMORY_INDEX_REFRESH'] = int(os.environ.get('MEMORY_INDEX_REFRESH', 60))
+
+# Corpos das respostas de conditional_get (chave: URL + ETag), com as versões gzip/brotli ao lado
+response_cache = TTLCache(
+    ttl=int(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+    maxsize=int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+)
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 2 * 1024 * 1024))
+
+# Compressão negociada por Accept-Encoding (respostas menores que o mínimo vão sem compressão)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+
+# Cache-Control max-age (segundos) por rota: HTTP_CACHE_MAX_AGE="get_categories=300,get_businesses=30"
+app.config['HTTP_CACHE_MAX_AGE'] = {
+    route: int(max_age)
+    for route, max_age in (
+        item.split('=', 1) for item in os.environ.get('HTTP_CACHE_MAX_AGE', '').split(',') if '=' in item
+    )
+}
+
+# Instrumentação SQL: Server-Timing (em debug ou SERVER_TIMING=1) e log estruturado acima dos limites
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 200))
+app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 1000))
+app.config['SQL_STATEMENT_WARN'] = int(os.environ.get('SQL_STATEMENT_WARN', 20))
+endpoint_stats = sqlstats.EndpointStats()
+
+# Métricas Prometheus em /metrics (METRICS_TOKEN exige "Authorization: Bearer <token>").
+# Com vários workers, METRICS_DIR deve ser um diretório compartilhado entre eles: cada
+# worker grava ali seu snapshot a cada METRICS_FLUSH_INTERVAL segundos e /metrics soma todos
+metrics = Metrics(
+    directory=os.environ.get('METRICS_DIR') or None,
+    flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+)
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+# Perfil sob demanda das próximas N requisições de um endpoint (admin), últimos resultados em memória
+profiler = RequestProfiler(capacity=int(os.environ.get('PROFILE_BUFFER_SIZE', 20)))
+
 # Configurar CORS
 cors_origins = os.environ.get('CORS_ORIGINS', '*').split(',')
 CORS(app, origins=cors_origins)
@@ -60,6 +183,9 @@ class Category(db.Model):
     icon = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
+    # Estabelecimentos ativos (mantido por apply_business_count / rebuild_business_counts)
+    business_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relacionamentos
     businesses = db.relationship('User', backref='category', lazy=True)
     
@@ -69,7 +195,7 @@ class Category(db.Model):
             'name': self.name,
             'description': self.description,
             'icon': self.icon,
-            'business_count': len(self.businesses)
+            'business_count': self.business_count or 0
         }
 
 class City(db.Model):
@@ -80,6 +206,9 @@ class City(db.Model):
     state = db.Column(db.String(2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
+    # Estabelecimentos ativos (mantido por apply_business_count / rebuild_business_counts)
+    business_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relacionamentos
     businesses = db.relationship('User', backref='city', lazy=True)
     
@@ -88,7 +217,7 @@ class City(db.Model):
             'id': self.id,
             'name': self.name,
             'state': self.state,
-            'business_count': len(self.businesses)
+            'business_count': self.business_count or 0
         }
 
 class User(db.Model):
@@ -104,7 +233,20 @@ class User(db.Model):
     address = db.Column(db.Text)
     description = db.Column(db.Text)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+    
+    # Agregados de avaliações aprovadas (mantidos por apply_review_rating / rebuild_rating_aggregates)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float, nullable=False, default=0, server_default='0', index=True)
+    
+    # Tokens normalizados para busca textual (mantido por index_business)
+    search_document = db.Column(db.Text)
+    
+    # Localização; geohash indexado serve de grade para consultas por raio
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12), index=True)
     
     # Chaves estrangeiras
     city_id = db.Column(db.Integer, db.ForeignKey('cities.id'))
@@ -115,39 +257,21 @@ class User(db.Model):
     
     @property
     def rating(self):
-        if not self.reviews:
-            return 0
-        return sum(review.rating for review in self.reviews) / len(self.reviews)
+        return self.rating_avg or 0
     
     @property
     def review_count(self):
-        return len(self.reviews)
+        return self.rating_count or 0
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'business_name': self.business_name,
-            'owner_name': self.owner_name,
-            'phone': self.phone,
-            'whatsapp': self.whatsapp,
-            'address': self.address,
-            'description': self.description,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'city_id': self.city_id,
-            'category_id': self.category_id,
-            'city': self.city.to_dict() if self.city else None,
-            'category': self.category.to_dict() if self.category else None,
-            'rating': round(self.rating, 1),
-            'review_count': self.review_count
-        }
+    def to_dict(self, fields=None):
+        """Serializa todos os campos de BUSINESS_FIELDS ou só os pedidos em fields"""
+        return {field: BUSINESS_FIELDS[field][1](self) for field in (fields or BUSINESS_FIELDS)}
 
 class Review(db.Model):
     __tablename__ = 'reviews'
@@ -163,35 +287,1258 @@ class Review(db.Model):
     # Chaves estrangeiras
     business_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'customer_name': self.customer_name,
-            'rating': self.rating,
-            'comment': self.comment,
-            'is_approved': self.is_approved,
-            'created_at': self.created_at.isoformat(),
-            'business_id': self.business_id
-        }
+    def to_dict(self, fields=None):
+        return {field: REVIEW_FIELDS[field][1](self) for field in (fields or REVIEW_FIELDS)}
+
+def column_field(column):
+    return (column,), operator.attrgetter(column.key)
+
+# Campos serializados (nome -> (colunas necessárias, valor)); base de to_dict e da projeção ?fields=
+BUSINESS_FIELDS = {
+    **{column.key: column_field(column) for column in (
+        User.id, User.email, User.business_name, User.owner_name, User.phone, User.whatsapp, User.address,
+        User.description, User.is_active, User.created_at, User.city_id, User.category_id,
+        User.latitude, User.longitude
+    )},
+    'city': ((User.city_id,), lambda user: user.city.to_dict() if user.city else None),
+    'category': ((User.category_id,), lambda user: user.category.to_dict() if user.category else None),
+    'rating': ((User.rating_avg,), lambda user: round(user.rating, 1)),
+    'review_count': ((User.rating_count,), operator.attrgetter('review_count'))
+}
+BUSINESS_RELATIONSHIPS = ('city', 'category')
+
+REVIEW_FIELDS = {
+    column.key: column_field(column) for column in (
+        Review.id, Review.customer_name, Review.rating, Review.comment, Review.is_approved,
+        Review.created_at, Review.business_id
+    )
+}
+
+# Índices compostos no formato das consultas quentes (criados pelas migrações 0007 e 0010)
+db.Index('ix_users_active_city_category', User.is_active, User.city_id, User.category_id)
+db.Index('ix_users_active_category', User.is_active, User.category_id)
+db.Index('ix_users_active_rating', User.is_active, User.rating_avg.desc(), User.id)
+db.Index('ix_users_active_geohash', User.is_active, User.geohash)
+db.Index('ix_users_active_city', User.is_active, User.city_id, User.id)
+db.Index('ix_reviews_business_approved_created', Review.business_id, Review.is_approved, Review.created_at.desc())
+db.Index('ix_reviews_approved_created', Review.is_approved, Review.created_at, Review.id)
+db.Index('ix_reviews_created', Review.created_at, Review.id)
+
+class DataVersion(db.Model):
+    """Carimbo de versão por domínio de dados, usado para ETag/Last-Modified sem serializar o corpo"""
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)  # categories, cities, businesses, reviews
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+class RevokedToken(db.Model):
+    """Tokens revogados antes de expirar (logout) e, por subject_key, os de contas desativadas; carregados em memória por cada worker"""
+    __tablename__ = 'revoked_tokens'
+    
+    jti = db.Column(db.String(32), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+def mark_changed(*domains):
+    """Incrementa a versão dos domínios na transação atual; os caches deste worker são invalidados após o commit"""
+    now = datetime.datetime.utcnow()
+    updated = DataVersion.query.filter(DataVersion.name.in_(domains)).update(
+        {DataVersion.version: DataVersion.version + 1, DataVersion.updated_at: now},
+        synchronize_session=False
+    )
+    if updated < len(domains):
+        existing = {name for (name,) in db.session.query(DataVersion.name).filter(DataVersion.name.in_(domains))}
+        for name in set(domains) - existing:
+            db.session.add(DataVersion(name=name, version=1, updated_at=now))
+    
+    # Domínio -> (versão antes da primeira escrita da transação, versão após a última); a linha
+    # fica travada até o commit, então a versão lida aqui é a que será gravada
+    changed = db.session.info.setdefault('changed_versions', {})
+    for name, version in db.session.query(DataVersion.name, DataVersion.version).filter(DataVersion.name.in_(domains)):
+        changed[name] = (changed[name][0] if name in changed else version - 1, version)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_changed_caches(session):
+    """Invalida os caches só depois do commit: antes dele, outra requisição recarregaria os dados antigos"""
+    changed = session.info.pop('changed_versions', {})
+    session.info['committed_versions'] = changed  # lido por memory_index_synced
+    if changed:
+        if changed.keys() & {'categories', 'cities'}:
+            reference_cache.invalidate()
+        dashboard_cache.invalidate()
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_changed_domains(session):
+    session.info.pop('changed_versions', None)
+    session.info.pop('committed_versions', None)
+
+def data_version(name):
+    """Versão atual do domínio: a que conditional_get leu nesta requisição ou, sem ela, a do banco"""
+    versions = g.get('data_versions') if has_request_context() else None
+    if versions is not None and name in versions:
+        return versions[name]
+    row = db.session.get(DataVersion, name)
+    return row.version if row else 0
+
+def conditional_get(*domains, max_age=0):
+    """Responde 304 via ETag/Last-Modified derivados das versões dos domínios, antes de carregar o ORM"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                rows = DataVersion.query.filter(DataVersion.name.in_(domains)).all()
+            except SQLAlchemyError:
+                # Sem o rollback, no PostgreSQL a transação abortada derrubaria também a rota
+                db.session.rollback()
+                return f(*args, **kwargs)
+            
+            versions = {row.name: row for row in rows}
+            g.data_versions = {row.name: row.version for row in rows}
+            etag = f.__name__ + '-' + '.'.join(
+                str(versions[name].version) if name in versions else '0' for name in domains
+            )
+            stamps = [row.updated_at for row in rows if row.updated_at]
+            last_modified = max(stamps).replace(microsecond=0, tzinfo=datetime.timezone.utc) if stamps else None
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = bool(
+                    last_modified and request.if_modified_since and last_modified <= request.if_modified_since
+                )
+            
+            if not_modified:
+                response = app.response_class(status=304)
+            else:
+                response = cached_response((request.full_path, etag), lambda: make_response(f(*args, **kwargs)))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                if last_modified:
+                    response.last_modified = last_modified
+                response.cache_control.public = True
+                response.cache_control.max_age = app.config['HTTP_CACHE_MAX_AGE'].get(f.__name__, max_age)
+            return response
+        return decorated_function
+    return decorator
+
+def cached_response(key, render):
+    """Serve o corpo do response_cache ou renderiza e guarda (só 200 não-streaming até RESPONSE_CACHE_MAX_BYTES)"""
+    cached = response_cache.get(key)
+    if cached is not None:
+        response = app.response_class(cached.data, mimetype=cached.mimetype)
+    else:
+        response = render()
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        data = response.get_data()
+        if len(data) > app.config['RESPONSE_CACHE_MAX_BYTES']:
+            return response
+        cached = compression.CachedBody(data, response.mimetype)
+        response_cache.set(key, cached)
+    
+    response.cached_body = cached
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli conforme Accept-Encoding; respostas do response_cache usam a versão já comprimida"""
+    if (response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in compression.COMPRESSIBLE_TYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = compression.accepted_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = compression.compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        length = response.calculate_content_length() or 0
+        if length < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        cached = getattr(response, 'cached_body', None)
+        body = cached.variant(encoding) if cached else compression.compress(response.get_data(), encoding)
+        if len(body) >= length:
+            return response
+        response.set_data(body)
+    
+    response.headers['Content-Encoding'] = encoding
+    # O corpo mudou de bytes, mas a representação é equivalente: ETag passa a ser fraco
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+# =====================================================
+# INSTRUMENTAÇÃO SQL
+# =====================================================
+# Listeners no Engine contam statements e tempo de banco da requisição em g;
+# ao final, os números vão para Server-Timing, para o log de lentidão e para
+# o agregado por endpoint (N+1 em to_dict aparece como statements_per_request).
+
+def current_sql_stats():
+    return g.get('sql_stats') if has_request_context() else None
+
+def log_slow_statement(statement, duration):
+    if duration * 1000 >= app.config['SLOW_QUERY_MS']:
+        sqlstats.log_event(
+            'slow_query',
+            duration_ms=round(duration * 1000, 3),
+            endpoint=request.endpoint if has_request_context() else None,
+            statement=statement[:2000]
+        )
+
+sqlstats.install(Engine, current_sql_stats, log_slow_statement)
+
+@app.before_request
+def start_sql_stats():
+    g.sql_stats = sqlstats.RequestStats()
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_stats(response):
+    """Server-Timing, log de requisição lenta/com muitas queries, agregado por endpoint e métricas"""
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    duration = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'not_found'
+    endpoint_stats.record(endpoint, stats, duration)
+    
+    metrics.inc('http_requests_total', (('endpoint', endpoint), ('method', request.method),
+                                        ('status', str(response.status_code))))
+    metrics.observe('http_request_duration_seconds', (('endpoint', endpoint),), duration)
+    metrics.inc('db_statements_total', (('endpoint', endpoint),), stats.statements)
+    metrics.inc('db_time_seconds_total', (('endpoint', endpoint),), stats.db_time)
+    
+    if app.debug or app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = sqlstats.server_timing(stats, duration)
+    
+    if (duration * 1000 >= app.config['SLOW_REQUEST_MS']
+            or stats.statements >= app.config['SQL_STATEMENT_WARN']):
+        sqlstats.log_event(
+            'slow_request',
+            method=request.method,
+            path=request.path,
+            endpoint=endpoint,
+            status=response.status_code,
+            duration_ms=round(duration * 1000, 3),
+            db_ms=round(stats.db_time * 1000, 3),
+            statements=stats.statements,
+            slowest_ms=round(stats.slowest_time * 1000, 3),
+            slowest_statement=(stats.slowest_statement or '')[:2000]
+        )
+    return response
+
+# =====================================================
+# MÉTRICAS (PROMETHEUS)
+# =====================================================
+# Contadores por thread, somados só na coleta; pool, caches e hashing de senha
+# são lidos na hora do scrape. Razão de acerto dos caches fica para a consulta:
+# rate(cache_hits_total) / (rate(cache_hits_total) + rate(cache_misses_total)).
+
+metrics.describe('http_requests_total', 'counter', 'Requisições HTTP por endpoint, método e status')
+metrics.describe('http_request_duration_seconds', 'histogram', 'Duração das requisições HTTP por endpoint')
+metrics.describe('http_requests_in_flight', 'gauge', 'Requisições em andamento')
+metrics.describe('db_statements_total', 'counter', 'Statements SQL executados por endpoint')
+metrics.describe('db_time_seconds_total', 'counter', 'Tempo gasto no banco por endpoint')
+metrics.describe('db_pool_checkouts_total', 'counter', 'Conexões retiradas do pool')
+metrics.describe('db_pool_wait_seconds', 'histogram', 'Espera para obter uma conexão do pool')
+metrics.describe('db_pool_hold_seconds', 'histogram', 'Tempo de uso de cada conexão retirada do pool')
+metrics.describe('db_pool_size', 'gauge', 'Tamanho configurado do pool de conexões')
+metrics.describe('db_pool_checked_out', 'gauge', 'Conexões do pool em uso')
+metrics.describe('db_pool_overflow', 'gauge', 'Conexões abertas além do tamanho do pool')
+metrics.describe('cache_hits_total', 'counter', 'Acertos dos caches em memória')
+metrics.describe('cache_misses_total', 'counter', 'Faltas dos caches em memória')
+metrics.describe('cache_entries', 'gauge', 'Entradas nos caches em memória')
+metrics.describe('password_pool_in_flight', 'gauge', 'Hashes de senha em execução ou na fila')
+metrics.describe('password_pool_rejected_total', 'counter', 'Hashes de senha recusados com a fila cheia')
+
+@event.listens_for(Pool, 'checkout')
+def count_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    metrics.inc('db_pool_checkouts_total')
+    connection_record.info['checked_out_at'] = time.perf_counter()
+
+@event.listens_for(Pool, 'checkin')
+def observe_pool_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop('checked_out_at', None)
+    if started is not None:
+        metrics.observe('db_pool_hold_seconds', (), time.perf_counter() - started)
+
+def pool_state():
+    """Ocupação do pool de conexões (None se o pool não for um QueuePool)"""
+    with app.app_context():
+        pool = db.engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    size, checked_out, max_overflow = pool.size(), pool.checkedout(), app.config['DATABASE_MAX_OVERFLOW']
+    return {
+        'size': size,
+        'checked_out': checked_out,
+        'overflow': max(pool.overflow(), 0),
+        'max_overflow': max_overflow,
+        'exhausted': max_overflow >= 0 and checked_out >= size + max_overflow
+    }
+
+def collect_pool_metrics():
+    state = pool_state()
+    if state:
+        yield 'db_pool_size', (), state['size']
+        yield 'db_pool_checked_out', (), state['checked_out']
+        yield 'db_pool_overflow', (), state['overflow']
+
+def collect_cache_metrics():
+    for name, cache in (('reference', reference_cache), ('dashboard', dashboard_cache), ('response', response_cache)):
+        stats = cache.stats()
+        yield 'cache_hits_total', (('cache', name),), stats['hits']
+        yield 'cache_misses_total', (('cache', name),), stats['misses']
+        yield 'cache_entries', (('cache', name),), stats['size']
+    stats = password_hasher.stats()
+    yield 'password_pool_in_flight', (), stats['in_flight']
+    yield 'password_pool_rejected_total', (), stats['rejected']
+
+metrics.register_callback(collect_pool_metrics)
+metrics.register_callback(collect_cache_metrics)
+
+@app.before_request
+def start_request_metrics():
+    metrics.inc('http_requests_in_flight')
+    g.metrics_in_flight = True
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if g.pop('metrics_in_flight', False):
+        metrics.inc('http_requests_in_flight', value=-1)
+    metrics.maybe_flush()
+
+@app.before_request
+def start_profile():
+    if profiler.targets:  # desarmado: nenhum custo além desta checagem
+        session = profiler.start(request.endpoint)
+        if session:
+            g.profile_session = session
+
+@app.after_request
+def stop_profile(response):
+    session = g.pop('profile_session', None)
+    if session:
+        profiler.stop(session, method=request.method, path=request.full_path, status=response.status_code)
+    return response
+
+class InvalidCursor(ValueError):
+    pass
+
+class InvalidFields(ValueError):
+    pass
+
+def requested_fields(available):
+    """Campos pedidos em ?fields=a,b (None = todos); InvalidFields se algum não existir"""
+    raw = request.args.get('fields', '')
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    if not fields:
+        return None
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise InvalidFields(', '.join(unknown))
+    return fields
+
+def projection_options(model, available, fields, relationships=(), extra_columns=()):
+    """load_only das colunas dos campos pedidos (+ extra_columns) e joinedload só dos relacionamentos pedidos"""
+    if fields is None:
+        return [db.joinedload(getattr(model, name)) for name in relationships]
+    
+    columns = {column.key: column for field in fields for column in available[field][0]}
+    columns.update((column.key, column) for column in extra_columns)
+    columns.pop('id', None)
+    options = [db.load_only(model.id, *columns.values())]
+    options += [db.joinedload(getattr(model, name)) for name in relationships if name in fields]
+    return options
+
+def invalid_fields_response(error):
+    return jsonify({'error': f'Campos inválidos: {error}'}), 400
+
+def encode_cursor(values):
+    """Token opaco com os valores da chave de ordenação do último item"""
+    payload = [value.isoformat() if isinstance(value, datetime.datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def cursor_value(column, value):
+    """Valor do cursor convertido para o tipo da coluna; ValueError se não for compatível"""
+    if value is None and column.nullable:
+        return None
+    if isinstance(column.type, db.DateTime) and isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(column.type, db.Integer) and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(column.type, db.Float) and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(column.type, db.String) and isinstance(value, str):
+        return value
+    raise ValueError(value)
+
+def decode_cursor(token, order):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(order):
+            raise InvalidCursor(token)
+        return [cursor_value(column, value) for (column, _), value in zip(order, payload)]
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+
+def keyset_paginate(query, order, cursor, per_page, with_total=False):
+    """Paginação por cursor: order é uma lista de (coluna, descendente); evita OFFSET e COUNT(*)"""
+    total = query.order_by(None).count() if with_total else None
+    
+    if cursor:
+        values = decode_cursor(cursor, order)
+        conditions = []
+        for i, (column, descending) in enumerate(order):
+            equal_prefix = [order[j][0] == values[j] for j in range(i)]
+            after = column < values[i] if descending else column > values[i]
+            conditions.append(db.and_(*equal_prefix, after))
+        query = query.filter(db.or_(*conditions))
+    
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in order])
+    items = query.limit(per_page + 1).all()
+    
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column, _ in order])
+    
+    return items, next_cursor, total
+
+# =====================================================
+# BUSCA TEXTUAL
+# =====================================================
+# O documento é normalizado em Python (sem acento + stemmer português) e
+# indexado com GIN/tsvector no PostgreSQL ou FTS5 no SQLite.
+
+_search_backend = None
+
+def search_backend():
+    """postgresql, fts5 ou like (fallback sem índice)"""
+    global _search_backend
+    if _search_backend is None:
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            _search_backend = 'postgresql'
+        elif dialect == 'sqlite' and db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'business_search'"
+        )).first():
+            _search_backend = 'fts5'
+        else:
+            _search_backend = 'like'
+    return _search_backend
+
+def search_vector():
+    return db.func.to_tsvector(db.literal_column("'simple'::regconfig"), db.func.coalesce(User.search_document, ''))
+
+def ensure_search_index():
+    """Cria o índice de busca (GIN no PostgreSQL, tabela FTS5 no SQLite)"""
+    global _search_backend
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        db.session.execute(db.text(
+            "CREATE INDEX IF NOT EXISTS ix_users_search_document ON users "
+            "USING GIN (to_tsvector('simple'::regconfig, coalesce(search_document, '')))"
+        ))
+    elif dialect == 'sqlite':
+        try:
+            db.session.execute(db.text('CREATE VIRTUAL TABLE IF NOT EXISTS business_search USING fts5(document)'))
+        except Exception as e:
+            print(f"⚠️ FTS5 indisponível, busca sem índice: {e}")
+    db.session.commit()
+    _search_backend = None
+
+def index_business(user):
+    """Atualiza o documento de busca do estabelecimento (register, update_profile, admin_update_user)"""
+    user.search_document = build_document(user.business_name, user.description)
+    if search_backend() == 'fts5':
+        db.session.flush()
+        db.session.execute(
+            db.text('INSERT OR REPLACE INTO business_search(rowid, document) VALUES (:id, :document)'),
+            {'id': user.id, 'document': user.search_document}
+        )
+
+def unindex_business(user_id):
+    if search_backend() == 'fts5':
+        db.session.execute(db.text('DELETE FROM business_search WHERE rowid = :id'), {'id': user_id})
+
+def apply_search(query, text, extra_columns=(), rank=False):
+    """Filtra a query pelo texto buscado; rank=True ordena por relevância"""
+    terms = tokenize(text)
+    if not text.strip():
+        return query
+    
+    backend = search_backend()
+    rank_order = None
+    if not terms:
+        # Só stopwords ou pontuação ("de", "---"): nada a casar no documento de busca
+        condition = db.false()
+    elif backend == 'postgresql':
+        ts_query = db.func.to_tsquery(
+            db.literal_column("'simple'::regconfig"), ' & '.join(f'{term}:*' for term in terms)
+        )
+        condition = search_vector().op('@@')(ts_query)
+        rank_order = db.func.ts_rank(search_vector(), ts_query).desc()
+    elif backend == 'fts5':
+        fts = db.literal_column('business_search')
+        matches = db.select(
+            db.literal_column('business_search.rowid').label('business_id'),
+            db.func.bm25(fts).label('rank')
+        ).select_from(db.text('business_search')).where(
+            fts.op('MATCH')(' '.join(f'"{term}"*' for term in terms))
+        ).subquery()
+        condition = User.id.in_(db.select(matches.c.business_id))
+        if rank:
+            query = query.outerjoin(matches, matches.c.business_id == User.id)
+            rank_order = matches.c.rank.asc()
+    else:
+        condition = db.and_(*[User.search_document.contains(term) for term in terms])
+    
+    if extra_columns:
+        condition = db.or_(condition, *[column.contains(text) for column in extra_columns])
+    query = query.filter(condition)
+    
+    if rank and rank_order is not None:
+        query = query.order_by(rank_order, User.id)
+    return query
+
+def rebuild_search_index():
+    """Recalcula o documento de busca de todos os estabelecimentos"""
+    ensure_search_index()
+    backend = search_backend()
+    if backend == 'fts5':
+        db.session.execute(db.text('DELETE FROM business_search'))
+    
+    rows = db.session.query(User.id, User.business_name, User.description).yield_per(1000)
+    batch = []
+    total = 0
+    for user_id, business_name, description in rows:
+        batch.append({'id': user_id, 'document': build_document(business_name, description)})
+        if len(batch) >= 1000:
+            total += _write_search_batch(batch, backend)
+            batch = []
+    total += _write_search_batch(batch, backend)
+    
+    db.session.commit()
+    return total
+
+def _write_search_batch(batch, backend):
+    if not batch:
+        return 0
+    db.session.execute(db.text('UPDATE users SET search_document = :document WHERE id = :id'), batch)
+    if backend == 'fts5':
+        db.session.execute(db.text('INSERT INTO business_search(rowid, document) VALUES (:id, :document)'), batch)
+    return len(batch)
+
+# =====================================================
+# ÍNDICES EM MEMÓRIA (AUTOCOMPLETE E CLUSTERS DO MAPA)
+# =====================================================
+# Cada worker mantém os seus: escritas locais atualizam os índices após o commit
+# (e avançam as versões vistas por eles) e, a cada MEMORY_INDEX_REFRESH segundos,
+# as versões em data_versions são comparadas para captar escritas feitas por
+# outros workers. Nesse caso o índice é reconstruído numa thread, e o atual
+# continua atendendo até a troca.
+
+MEMORY_INDEX_DOMAINS = ('businesses', 'cities', 'categories')
+_memory_index_state = {}  # nome -> {'versions': ..., 'checked_at': ..., 'building': ...}
+_memory_index_locks = {}  # nome -> Lock da construção
+
+def memory_index_versions(domains=MEMORY_INDEX_DOMAINS):
+    rows = DataVersion.query.filter(DataVersion.name.in_(domains)).all()
+    return {row.name: row.version for row in rows}
+
+def build_memory_index(name, build, domains):
+    versions = memory_index_versions(domains)  # antes da carga: escritas durante ela forçam nova reconstrução
+    build()
+    _memory_index_state[name] = {'versions': versions, 'checked_at': time.monotonic(), 'building': False}
+
+def rebuild_memory_index(name, build, domains):
+    """Reconstrução em segundo plano (thread com o próprio app context)"""
+    with app.app_context():
+        try:
+            build_memory_index(name, build, domains)
+        except Exception as e:
+            print(f"❌ Erro ao reconstruir o índice {name}: {e}")
+            _memory_index_state[name]['building'] = False
+
+def ensure_memory_index(name, build, domains=MEMORY_INDEX_DOMAINS):
+    """Constrói o índice na primeira consulta e o reconstrói se os dados mudaram em outro worker
+
+    Só a primeira construção bloqueia (uma por índice; as requisições concorrentes
+    esperam por ela). As seguintes rodam em segundo plano.
+    """
+    state = _memory_index_state.get(name)
+    if state is None:
+        with _memory_index_locks.setdefault(name, threading.Lock()):
+            if name not in _memory_index_state:
+                build_memory_index(name, build, domains)
+        return
+    
+    if state['building'] or time.monotonic() - state['checked_at'] <= app.config['MEMORY_INDEX_REFRESH']:
+        return
+    state['checked_at'] = time.monotonic()
+    if memory_index_versions(domains) == state['versions']:
+        return
+    
+    with _memory_index_locks[name]:
+        if state['building']:
+            return
+        state['building'] = True
+    threading.Thread(target=rebuild_memory_index, args=(name, build, domains),
+                     name=f'rebuild-{name}', daemon=True).start()
+
+def memory_index_synced(*names):
+    """Depois de aplicar uma escrita local aos índices (após o commit), marca as versões dela como vistas
+
+    Só avança o domínio cuja versão antes da escrita era a vista pelo índice: se outro
+    worker escreveu no meio, a diferença continua e o índice é reconstruído.
+    """
+    committed = db.session.info.get('committed_versions', {})
+    for name in names:
+        state = _memory_index_state.get(name)
+        if state is None:
+            continue
+        for domain, (before, after) in committed.items():
+            if state['versions'].get(domain) == before:
+                state['versions'][domain] = after
+
+def expire_memory_indexes():
+    """Força a conferência de versões na próxima consulta (escritas em lote, sem sincronização item a item)"""
+    for state in _memory_index_state.values():
+        state['checked_at'] = float('-inf')
+
+def autocomplete_business_item(business_id, business_name, rating, city_id, category_id):
+    data = {'id': business_id, 'business_name': business_name, 'rating': round(rating or 0, 1),
+            'city_id': city_id, 'category_id': category_id}
+    return ('business', business_id, business_name, rating or 0, data)
+
+def cluster_point(business_id, latitude, longitude, rating, business_name):
+    data = {'id': business_id, 'business_name': business_name, 'rating': round(rating or 0, 1),
+            'latitude': latitude, 'longitude': longitude}
+    return (business_id, latitude, longitude, rating or 0, data)
+
+def build_autocomplete_index():
+    """Carrega estabelecimentos ativos, categorias e cidades no índice de prefixos (só colunas necessárias)"""
+    businesses = db.session.query(
+        User.id, User.business_name, User.rating_avg, User.city_id, User.category_id
+    ).filter(User.is_active == True).yield_per(5000)
+    categories = db.session.query(Category.id, Category.name, Category.business_count)
+    cities = db.session.query(City.id, City.name, City.state, City.business_count)
+    
+    items = [autocomplete_business_item(*row) for row in businesses]
+    items += [('category', id, name, count or 0, {'id': id, 'name': name}) for id, name, count in categories]
+    items += [('city', id, name, count or 0, {'id': id, 'name': name, 'state': state})
+              for id, name, state, count in cities]
+    autocomplete_index.load(items)
+
+def build_cluster_index():
+    """Carrega as coordenadas dos estabelecimentos ativos na grade de clusters"""
+    rows = db.session.query(
+        User.id, User.latitude, User.longitude, User.rating_avg, User.business_name
+    ).filter(
+        User.is_active == True, User.latitude.isnot(None), User.longitude.isnot(None)
+    ).yield_per(5000)
+    cluster_index.load(cluster_point(*row) for row in rows)
+
+def sync_business_indexes(user):
+    """Atualiza o estabelecimento nos índices em memória já construídos (chamar após o commit)"""
+    if 'autocomplete' in _memory_index_state:
+        if user.is_active:
+            autocomplete_index.add(*autocomplete_business_item(
+                user.id, user.business_name, user.rating_avg, user.city_id, user.category_id
+            ))
+        else:
+            autocomplete_index.remove('business', user.id)
+    
+    if 'clusters' in _memory_index_state:
+        if user.is_active and user.latitude is not None and user.longitude is not None:
+            cluster_index.add(*cluster_point(
+                user.id, user.latitude, user.longitude, user.rating_avg, user.business_name
+            ))
+        else:
+            cluster_index.remove(user.id)
+    
+    memory_index_synced('autocomplete', 'clusters')
+
+def remove_business_indexes(user_id):
+    autocomplete_index.remove('business', user_id)
+    cluster_index.remove(user_id)
+    memory_index_synced('autocomplete', 'clusters')
+
+def autocomplete_sync_reference(kind, obj, item_id=None):
+    """Atualiza (ou remove, se obj for None) uma categoria/cidade no índice após o commit"""
+    if 'autocomplete' in _memory_index_state:
+        if obj is None:
+            autocomplete_index.remove(kind, item_id)
+        else:
+            data = {'id': obj.id, 'name': obj.name}
+            if kind == 'city':
+                data['state'] = obj.state
+            autocomplete_index.add(kind, obj.id, obj.name, obj.business_count or 0, data)
+    
+    # Os clusters não dependem de cidades/categorias; a versão de businesses que essas escritas
+    # também incrementam não muda nenhum ponto
+    memory_index_synced('autocomplete', 'clusters')
+
+# =====================================================
+# TOKENS DE ACESSO
+# =====================================================
+# Verificação só com HMAC + LRU em memória; o banco é lido apenas para
+# recarregar a lista de revogação quando outro worker registra um logout.
+
+def load_revoked_tokens():
+    now = datetime.datetime.utcnow()
+    rows = db.session.query(RevokedToken.jti, RevokedToken.expires_at).filter(RevokedToken.expires_at > now)
+    token_signer.load_revoked(
+        (jti, expires_at.replace(tzinfo=datetime.timezone.utc).timestamp()) for jti, expires_at in rows
+    )
+
+def revoke_token(claims):
+    """Revoga o token (logout) neste worker e, via revoked_tokens, nos demais"""
+    expires_at = datetime.datetime.fromtimestamp(claims['exp'], datetime.timezone.utc).replace(tzinfo=None)
+    db.session.merge(RevokedToken(jti=claims['jti'], expires_at=expires_at))
+    RevokedToken.query.filter(RevokedToken.expires_at <= datetime.datetime.utcnow()).delete(synchronize_session=False)
+    mark_changed('tokens')
+    db.session.commit()
+    token_signer.revoke(claims['jti'], claims['exp'])
+    memory_index_synced('revoked_tokens')
+
+def stage_user_tokens_revocation(user_id, role='business'):
+    """Registra na transação a revogação dos tokens já emitidos para o usuário (desativação/remoção)
+
+    Devolve (chave, expiração) para token_signer.revoke após o commit.
+    """
+    key = subject_key(role, user_id)
+    exp = time.time() + token_signer.ttl
+    expires_at = datetime.datetime.fromtimestamp(exp, datetime.timezone.utc).replace(tzinfo=None)
+    db.session.merge(RevokedToken(jti=key, expires_at=expires_at))
+    mark_changed('tokens')
+    return key, exp
+
+def apply_tokens_revocation(revocation):
+    """Aplica neste worker a revogação de stage_user_tokens_revocation (chamar após o commit)"""
+    token_signer.revoke(*revocation)
+    memory_index_synced('revoked_tokens')
+
+def token_required(role=None):
+    """Decorator: exige token Bearer válido (e do papel indicado); as claims ficam em g.token_claims"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            auth_header = request.headers.get('Authorization', '')
+            if not auth_header.startswith('Bearer '):
+                return jsonify({'error': 'Token de acesso requerido'}), 401
+            
+            try:
+                ensure_memory_index('revoked_tokens', load_revoked_tokens, ('tokens',))
+                claims = token_signer.verify(auth_header[len('Bearer '):])
+            except TokenError as e:
+                return jsonify({'error': str(e)}), 401
+            
+            if role and claims['role'] != role:
+                return jsonify({'error': 'Token sem permissão para esta operação'}), 403
+            
+            g.token_claims = claims
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def apply_location(user, data):
+    """Atualiza latitude/longitude/geohash a partir do payload; retorna mensagem de erro ou None"""
+    if 'latitude' not in data and 'longitude' not in data:
+        return None
+    
+    latitude, longitude = data.get('latitude'), data.get('longitude')
+    if latitude in (None, '') and longitude in (None, ''):
+        user.latitude = user.longitude = user.geohash = None
+        return None
+    
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return 'Latitude e longitude devem ser numéricas'
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return 'Coordenadas fora do intervalo válido'
+    
+    user.latitude = latitude
+    user.longitude = longitude
+    user.geohash = geo.encode(latitude, longitude)
+    return None
+
+def password_pool_busy():
+    """Resposta 503 quando o pool de hashing de senha está saturado"""
+    response = jsonify({'error': 'Servidor ocupado, tente novamente em instantes'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def normalized_fields(fields):
+    """Campos de cada estabelecimento no formato normalizado: city/category viram city_id/category_id"""
+    fields = fields or list(BUSINESS_FIELDS)
+    row_fields = [field for field in fields if field not in BUSINESS_RELATIONSHIPS]
+    for name in BUSINESS_RELATIONSHIPS:
+        if name in fields and f'{name}_id' not in row_fields:
+            row_fields.append(f'{name}_id')
+    return row_fields
+
+def business_listing(items, fields, normalized=False):
+    """{'businesses': [...]}; normalizado, cidades e categorias vêm uma vez cada em mapas por id"""
+    if not normalized:
+        return {'businesses': [item.to_dict(fields) for item in items]}
+    
+    businesses = [item.to_dict(normalized_fields(fields)) for item in items]
+    result = {'businesses': businesses}
+    requested = fields or BUSINESS_FIELDS
+    # Mapas saem do reference_cache (sem consulta); só entram as entidades referenciadas na página.
+    # Ids que faltam no cache (criados depois da versão lida) vêm numa única consulta por id
+    for name, key, reference, model in (('city', 'cities', list_cities, City),
+                                        ('category', 'categories', list_categories, Category)):
+        if name in requested:
+            ids = {business[f'{name}_id'] for business in businesses} - {None}
+            entries = {str(entry['id']): entry for entry in reference() if entry['id'] in ids}
+            missing = ids - {int(entry_id) for entry_id in entries}
+            if missing:
+                entries.update((str(obj.id), obj.to_dict()) for obj in model.query.filter(model.id.in_(missing)))
+            result[key] = entries
+    return result
+
+def list_categories():
+    """Lista de categorias serializada (reference_cache com chave na versão: escrita de outro worker muda a chave)"""
+    return reference_cache.get_or_set(
+        ('categories', data_version('categories')), lambda: [category.to_dict() for category in Category.query.all()]
+    )
+
+def list_cities():
+    """Lista de cidades serializada (reference_cache com chave na versão: escrita de outro worker muda a chave)"""
+    return reference_cache.get_or_set(
+        ('cities', data_version('cities')), lambda: [city.to_dict() for city in City.query.all()]
+    )
+
+def apply_business_count(city_id, category_id, delta):
+    """Soma (delta=1) ou remove (delta=-1) um estabelecimento ativo do business_count da cidade e da categoria"""
+    if city_id:
+        City.query.filter_by(id=city_id).update(
+            {City.business_count: City.business_count + delta}, synchronize_session=False
+        )
+    if category_id:
+        Category.query.filter_by(id=category_id).update(
+            {Category.business_count: Category.business_count + delta}, synchronize_session=False
+        )
+    mark_changed('cities', 'categories')
+
+def business_count_state(user):
+    """Estado do estabelecimento que afeta os contadores de cidade/categoria"""
+    return (bool(user.is_active), user.city_id, user.category_id)
+
+def sync_business_counts(old_state, user):
+    """Atualiza os contadores quando is_active, city_id ou category_id mudam"""
+    new_state = business_count_state(user)
+    if new_state == old_state:
+        return
+    
+    if old_state[0]:
+        apply_business_count(old_state[1], old_state[2], -1)
+    if new_state[0]:
+        apply_business_count(new_state[1], new_state[2], 1)
+
+def rebuild_business_counts():
+    """Recalcula o business_count de todas as cidades e categorias a partir de users"""
+    city_count = db.select(db.func.count(User.id)).where(
+        User.city_id == City.id, User.is_active == True
+    ).scalar_subquery()
+    category_count = db.select(db.func.count(User.id)).where(
+        User.category_id == Category.id, User.is_active == True
+    ).scalar_subquery()
+    
+    City.query.update({City.business_count: city_count}, synchronize_session=False)
+    Category.query.update({Category.business_count: category_count}, synchronize_session=False)
+    mark_changed('cities', 'categories')
+    db.session.commit()
+
+def apply_review_rating(business_id, rating, delta):
+    """Soma (delta=1) ou remove (delta=-1) uma avaliação dos agregados do estabelecimento em um único UPDATE"""
+    new_sum = User.rating_sum + delta * rating
+    new_count = User.rating_count + delta
+    
+    User.query.filter_by(id=business_id).update({
+        User.rating_sum: new_sum,
+        User.rating_count: new_count,
+        User.rating_avg: db.case((new_count > 0, db.cast(new_sum, db.Float) / new_count), else_=0)
+    }, synchronize_session=False)
+    mark_changed('businesses')
+
+def rebuild_rating_aggregates():
+    """Recalcula rating_sum, rating_count e rating_avg de todos os estabelecimentos a partir de reviews"""
+    approved = db.and_(Review.business_id == User.id, Review.is_approved == True)
+    rating_sum = db.select(db.func.coalesce(db.func.sum(Review.rating), 0)).where(approved).scalar_subquery()
+    rating_count = db.select(db.func.count(Review.id)).where(approved).scalar_subquery()
+    rating_avg = db.select(db.func.coalesce(db.func.avg(Review.rating), 0)).where(approved).scalar_subquery()
+    
+    updated = User.query.update({
+        User.rating_sum: rating_sum,
+        User.rating_count: rating_count,
+        User.rating_avg: rating_avg
+    }, synchronize_session=False)
+    mark_changed('businesses')
+    db.session.commit()
+    return updated
+
+@app.cli.command('rebuild-ratings')
+def rebuild_ratings_command():
+    """Recalcula os agregados de avaliação (flask --app main rebuild-ratings)"""
+    updated = rebuild_rating_aggregates()
+    print(f"✅ Agregados de avaliação recalculados para {updated} estabelecimentos")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Recria o índice de busca textual (flask --app main rebuild-search-index)"""
+    total = rebuild_search_index()
+    print(f"✅ Índice de busca recriado para {total} estabelecimentos ({search_backend()})")
+
+@app.cli.command('rebuild-business-counts')
+def rebuild_business_counts_command():
+    """Recalcula o business_count de cidades e categorias (flask --app main rebuild-business-counts)"""
+    rebuild_business_counts()
+    print("✅ Contadores de estabelecimentos recalculados")
+
+# =====================================================
+# MIGRAÇÕES E PLANOS DE CONSULTA
+# =====================================================
+
+def upgrade_database(target=None):
+    """Aplica as migrações pendentes (em banco vazio, cria o schema completo)"""
+    global _search_backend
+    applied = migrations.upgrade(db.engine, db.metadata, target)
+    _search_backend = None
+    return applied
+
+def hot_queries():
+    """Consultas mais frequentes e o índice que cada uma deve usar"""
+    return [
+        ('listagem por cidade e categoria', 'ix_users_active_city_category',
+         User.query.filter_by(is_active=True, city_id=1, category_id=1).order_by(User.id)),
+        ('listagem por cidade', 'ix_users_active_city',
+         User.query.filter_by(is_active=True, city_id=1).order_by(User.id)),
+        ('listagem por categoria', 'ix_users_active_category',
+         User.query.filter_by(is_active=True, category_id=1).order_by(User.id)),
+        ('listagem por avaliação (sort=rating)', 'ix_users_active_rating',
+         User.query.filter_by(is_active=True).order_by(User.rating_avg.desc(), User.id)),
+        ('estabelecimentos próximos', 'ix_users_active_geohash',
+         User.query.filter(User.is_active == True, nearby_filter(-23.4336, -45.0838, 5))),
+        ('avaliações aprovadas do estabelecimento', 'ix_reviews_business_approved_created',
+         Review.query.filter_by(business_id=1, is_approved=True).order_by(Review.created_at.desc())),
+        ('avaliações pendentes (admin)', 'ix_reviews_approved_created',
+         Review.query.filter_by(is_approved=False).order_by(Review.created_at.desc(), Review.id.desc())),
+        ('todas as avaliações (admin)', 'ix_reviews_created',
+         Review.query.order_by(Review.created_at.desc(), Review.id.desc())),
+    ]
+
+def explain_query(query):
+    """Plano de execução da query (EXPLAIN QUERY PLAN no SQLite, EXPLAIN no PostgreSQL)"""
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    if db.engine.dialect.name == 'postgresql':
+        # Tabelas pequenas sempre dão seq scan; desligado só para ver se o índice é utilizável
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+        plan = [row[0] for row in db.session.execute(db.text(f'EXPLAIN {sql}'))]
+    else:
+        plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+    db.session.rollback()
+    return plan
+
+def check_query_plan(index_name, query):
+    """(ok, plano): ok se o plano usa index_name e não ordena em memória"""
+    plan = explain_query(query)
+    uses_index = any(index_name in line for line in plan)
+    sorts = any('TEMP B-TREE' in line or line.lstrip().startswith('Sort') for line in plan)
+    return uses_index and not sorts, plan
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Aplica as migrações pendentes (flask --app main db-upgrade)"""
+    applied = upgrade_database()
+    print(f"✅ Banco atualizado ({len(applied)} migrações aplicadas)")
+
+@app.cli.command('db-status')
+def db_status_command():
+    """Lista as migrações pendentes (flask --app main db-status)"""
+    pending = migrations.pending_migrations(db.engine)
+    for version, description in pending:
+        print(f"⏳ {version} {description}")
+    print(f"📊 {len(migrations.MIGRATIONS) - len(pending)} aplicadas, {len(pending)} pendentes")
+
+@app.cli.command('db-explain')
+def db_explain_command():
+    """Confere no EXPLAIN se as consultas quentes usam seus índices (flask --app main db-explain)"""
+    failures = 0
+    for description, index_name, query in hot_queries():
+        ok, plan = check_query_plan(index_name, query)
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {description}: {index_name}")
+        for line in plan:
+            print(f"    {line}")
+    if failures:
+        sys.exit(1)
+
+@app.cli.command('bench-json')
+@click.option('--count', default=1000, show_default=True)
+@click.option('--rounds', default=20, show_default=True)
+def bench_json_command(count, rounds):
+    """Compara a serialização de N estabelecimentos entre os providers JSON (flask --app main bench-json)"""
+    city = City(id=1, name='Ubatuba', state='SP', business_count=count)
+    category = Category(id=1, name='Autopeças', description='Peças e acessórios', icon='🚗', business_count=count)
+    now = datetime.datetime.utcnow()
+    payload = {'businesses': [
+        User(
+            id=index, email=f'loja{index}@exemplo.com', business_name=f'Loja São João {index}', owner_name='José',
+            phone='12999990000', whatsapp='12999990000', address='Av. Rio Grande do Sul, 100',
+            description='Peças, acessórios e serviços automotivos', is_active=True, created_at=now,
+            city_id=1, category_id=1, city=city, category=category, rating_avg=4.5, rating_count=10,
+            latitude=-23.43, longitude=-45.07
+        ).to_dict()
+        for index in range(count)
+    ], 'total': count}
+    
+    for name, provider in json_provider.PROVIDERS.items():
+        if name == 'orjson' and json_provider.orjson is None:
+            print(f"⚠️ {name}: não instalado")
+            continue
+        provider = provider(app)
+        with app.app_context():
+            started = time.perf_counter()
+            for _ in range(rounds):
+                body = provider.response(payload).get_data()
+            elapsed = (time.perf_counter() - started) / rounds
+        print(f"📦 {name}: {elapsed * 1000:.2f} ms por resposta ({len(body) / 1024:.0f} KiB)")
+
+# =====================================================
+# IMPORTAÇÃO EM LOTE DE ESTABELECIMENTOS
+# =====================================================
+# Cidades e categorias são resolvidas por nome uma única vez, os hashes de
+# senha são gerados em paralelo e as linhas são inseridas em lotes (COPY no
+# PostgreSQL, executemany nos demais). Emails já cadastrados são ignorados,
+# então reimportar o mesmo arquivo não duplica nada.
+
+IMPORT_COLUMNS = (
+    'email', 'password_hash', 'business_name', 'owner_name', 'phone', 'whatsapp', 'address', 'description',
+    'is_active', 'created_at', 'rating_sum', 'rating_count', 'rating_avg', 'search_document',
+    'latitude', 'longitude', 'geohash', 'city_id', 'category_id'
+)
+# Texto opcional gravado como '' (nunca NULL); no COPY em CSV um campo vazio vira NULL sem FORCE_NOT_NULL
+IMPORT_TEXT_COLUMNS = ('phone', 'whatsapp', 'address', 'description')
+
+def import_reference_maps():
+    """Mapas nome -> id de cidades ({nome: {estado: id}}) e categorias ({nome: id})"""
+    cities = {}
+    for city_id, name, state in db.session.query(City.id, City.name, City.state):
+        cities.setdefault(importer.name_key(name), {})[state.upper()] = city_id
+    categories = {importer.name_key(name): category_id for category_id, name in db.session.query(Category.id, Category.name)}
+    return cities, categories
+
+def prepare_import_row(record, cities, categories, now):
+    """Valida um registro e monta a linha de users; retorna (linha, erro)"""
+    data = {field: importer.clean(record.get(field)) for field in importer.REQUIRED_FIELDS + importer.OPTIONAL_FIELDS}
+    missing = [field for field in importer.REQUIRED_FIELDS if not data[field]]
+    if missing:
+        return None, f"Campos obrigatórios ausentes: {', '.join(missing)}"
+    
+    states = cities.get(importer.name_key(data['city']), {})
+    if data['state']:
+        city_id = states.get(data['state'].upper())
+    else:
+        city_id = next(iter(states.values())) if len(states) == 1 else None
+    if city_id is None:
+        return None, f"Cidade não encontrada ou ambígua: {data['city']}"
+    
+    category_id = categories.get(importer.name_key(data['category']))
+    if category_id is None:
+        return None, f"Categoria não encontrada: {data['category']}"
+    
+    location = types.SimpleNamespace(latitude=None, longitude=None, geohash=None)
+    location_error = apply_location(location, {
+        field: data[field] for field in ('latitude', 'longitude') if data[field] is not None
+    })
+    if location_error:
+        return None, location_error
+    
+    return {
+        'email': data['email'],
+        'password': data['password'],
+        'business_name': data['business_name'],
+        'owner_name': data['owner_name'],
+        'phone': data['phone'] or '',
+        'whatsapp': data['whatsapp'] or '',
+        'address': data['address'] or '',
+        'description': data['description'] or '',
+        'is_active': True,
+        'created_at': now,
+        'rating_sum': 0,
+        'rating_count': 0,
+        'rating_avg': 0,
+        'search_document': build_document(data['business_name'], data['description']),
+        'latitude': location.latitude,
+        'longitude': location.longitude,
+        'geohash': location.geohash,
+        'city_id': city_id,
+        'category_id': category_id
+    }, None
+
+def existing_emails(emails, batch_size=1000):
+    found = set()
+    for start in range(0, len(emails), batch_size):
+        batch = emails[start:start + batch_size]
+        found.update(email for (email,) in db.session.query(User.email).filter(User.email.in_(batch)))
+    return found
+
+def insert_import_batch(rows):
+    """Insere um lote de linhas de users (COPY no PostgreSQL, executemany nos demais)"""
+    if db.engine.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([export_value(row[column]) for column in IMPORT_COLUMNS])
+        buffer.seek(0)
+        cursor = db.session.connection().connection.dbapi_connection.cursor()
+        cursor.copy_expert(
+            f"COPY users ({', '.join(IMPORT_COLUMNS)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(IMPORT_TEXT_COLUMNS)}))", buffer
+        )
+        return
+    
+    db.session.execute(User.__table__.insert(), [{column: row[column] for column in IMPORT_COLUMNS} for row in rows])
+    if search_backend() == 'fts5':
+        db.session.execute(db.text(
+            'INSERT OR REPLACE INTO business_search(rowid, document) '
+            'SELECT id, search_document FROM users WHERE email IN :emails'
+        ).bindparams(db.bindparam('emails', expanding=True)), {'emails': [row['email'] for row in rows]})
+
+def import_businesses(records, batch_size=1000, hash_password=None):
+    """Importa registros de estabelecimentos; retorna um importer.ImportReport
+
+    hash_password (ex.: password_hasher.hash) substitui o pool de processos de
+    importer.hash_passwords, que só deve ser usado fora do servidor web.
+    """
+    report = importer.ImportReport()
+    started = time.perf_counter()
+    now = datetime.datetime.utcnow()
+    cities, categories = import_reference_maps()
+    
+    rows = []
+    seen = set()
+    for number, record in enumerate(records, 1):
+        report.total += 1
+        if not isinstance(record, dict):
+            report.error(number, 'Registro deve ser um objeto')
+            continue
+        row, error = prepare_import_row(record, cities, categories, now)
+        if error:
+            report.error(number, error)
+        elif row['email'] in seen:
+            report.skipped += 1
+        else:
+            seen.add(row['email'])
+            rows.append(row)
+    
+    existing = existing_emails([row['email'] for row in rows])
+    rows = [row for row in rows if row['email'] not in existing]
+    report.skipped += len(existing)
+    
+    hashes = importer.hash_passwords([row.pop('password') for row in rows], method=password_hasher.method,
+                                     hash_password=hash_password)
+    for row, password_hash in zip(rows, hashes):
+        row['password_hash'] = password_hash
+    
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        insert_import_batch(batch)
+        for city_id, count in Counter(row['city_id'] for row in batch).items():
+            apply_business_count(city_id, None, count)
+        for category_id, count in Counter(row['category_id'] for row in batch).items():
+            apply_business_count(None, category_id, count)
+        mark_changed('businesses')
+        db.session.commit()
+        report.inserted += len(batch)
+    
+    if report.inserted:
+        # Índices em memória são reconstruídos (em segundo plano) a partir da próxima consulta
+        expire_memory_indexes()
+    
+    report.elapsed = time.perf_counter() - started
+    return report
+
+@app.cli.command('import-businesses')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'json', 'ndjson']), default=None)
+@click.option('--batch-size', default=1000, show_default=True)
+def import_businesses_command(path, file_format, batch_size):
+    """Importa estabelecimentos de um arquivo CSV/JSON/NDJSON (flask --app main import-businesses arquivo.csv)"""
+    with open(path, 'rb') as stream:
+        records = importer.read_records(stream, file_format or importer.detect_format(path))
+    
+    report = import_businesses(records, batch_size).to_dict()
+    print(f"✅ {report['inserted']} inseridos, {report['skipped']} ignorados, {report['error_count']} com erro "
+          f"em {report['elapsed']}s ({report['rows_per_second']} linhas/s)")
+    for error in report['errors']:
+        print(f"    linha {error['row']}: {error['error']}")
+
+# Métricas no formato de exposição do Prometheus
+@app.route('/metrics')
+def prometheus_metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Token de métricas inválido'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Rotas de Health Check e Debug
+# Liveness (/health) não toca o banco; readiness (/health/ready) usa o ping em
+# cache por HEALTH_PING_TTL segundos e o estado do pool, então probes do load
+# balancer não somam carga ao banco.
+
+def database_ping():
+    """SELECT 1 em uma conexão do pool, com o resultado (ok ou erro) em cache por HEALTH_PING_TTL"""
+    def ping():
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(db.text('SELECT 1'))
+            return {'status': 'connected', 'latency_ms': round((time.perf_counter() - started) * 1000, 3),
+                    'checked_at': datetime.datetime.utcnow().isoformat()}
+        except Exception as e:
+            return {'status': f'error: {str(e)}', 'checked_at': datetime.datetime.utcnow().isoformat()}
+    return health_cache.get_or_set('ping', ping)
+
+def table_counts(exact=False):
+    """Linhas por tabela: estimativa do catálogo (pg_class.reltuples) no PostgreSQL, COUNT(*) nos demais ou com exact"""
+    tables = {'categories': Category, 'cities': City, 'users': User, 'reviews': Review}
+    counts = {}
+    if db.engine.dialect.name == 'postgresql' and not exact:
+        rows = db.session.execute(
+            db.text('SELECT relname, reltuples FROM pg_class '
+                    'WHERE relname IN :names AND relkind = \'r\' AND relnamespace = current_schema()::regnamespace')
+            .bindparams(db.bindparam('names', expanding=True)),
+            {'names': list(tables)}
+        )
+        # reltuples = -1 (ou 0 antes do primeiro ANALYZE): sem estimativa, cai no COUNT(*)
+        counts = {name: int(estimate) for name, estimate in rows if estimate > 0}
+    estimated = bool(counts)
+    for name, model in tables.items():
+        if name not in counts:
+            counts[name] = db.session.query(db.func.count()).select_from(model).scalar()
+    return counts, estimated
+
 @app.route('/')
 def health_check():
-    try:
-        # Testar conexão com banco
-        db.session.execute(db.text('SELECT 1'))
-        db_status = "connected"
-        db_type = "PostgreSQL" if database_url else "SQLite"
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-        db_type = "unknown"
-    
+    ping = database_ping()
     return jsonify({
         'status': 'healthy',
         'message': 'Peça no Zap API funcionando!',
         'database': {
-            'status': db_status,
-            'type': db_type
+            'status': ping['status'],
+            'type': "PostgreSQL" if database_url else "SQLite"
         },
         'version': '1.0.0',
         'endpoints': [
@@ -210,9 +1557,27 @@ def health_check():
     }), 200
 
 @app.route('/health')
+@app.route('/health/live')
 def health():
     return jsonify({'status': 'ok'}), 200
 
+@app.route('/health/ready')
+def readiness():
+    """Pronto para receber tráfego: banco respondeu ao ping (em cache) e o pool não está esgotado"""
+    pool = pool_state()
+    if pool and pool['exhausted']:
+        # Sem conexão livre o ping esperaria o pool_timeout; o pool cheio já responde a pergunta
+        ping = health_cache.get('ping') or {'status': 'pool_exhausted'}
+        ready = False
+    else:
+        ping = database_ping()
+        ready = ping['status'] == 'connected'
+    return jsonify({
+        'status': 'ready' if ready else 'unavailable',
+        'database': ping,
+        'pool': pool
+    }), 200 if ready else 503
+
 # Rota base da API
 @app.route('/api/')
 def api_root():
@@ -242,24 +1607,15 @@ def api_root():
 @app.route('/api/test-db')
 def test_database():
     try:
-        # Testar criação de tabelas
-        db.create_all()
-        print("✅ Tabelas verificadas/criadas")
-        
-        # Testar query
-        categories = Category.query.all()
-        cities = City.query.all()
-        users = User.query.all()
+        counts, estimated = table_counts(exact=request.args.get('exact') in ('1', 'true'))
         
         return jsonify({
             'status': 'success',
             'message': 'Banco conectado e funcionando!',
             'database_type': 'PostgreSQL' if database_url else 'SQLite',
-            'tables': {
-                'categories': len(categories),
-                'cities': len(cities),
-                'users': len(users)
-            }
+            'tables': counts,
+            'estimated': estimated,
+            'migrations_pending': [version for version, _ in migrations.pending_migrations(db.engine)]
         }), 200
     except Exception as e:
         return jsonify({
@@ -271,31 +1627,17 @@ def test_database():
 @app.route('/api/debug-connection')
 def debug_connection():
     try:
-        import psycopg2
-        
-        database_url = os.environ.get('DATABASE_URL')
-        if not database_url:
-            return jsonify({
-                'status': 'error',
-                'message': 'DATABASE_URL não configurada'
-            }), 400
-        
-        # Corrigir URL se necessário
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-        
-        # Testar conexão direta
-        conn = psycopg2.connect(database_url)
-        cursor = conn.cursor()
-        cursor.execute('SELECT version();')
-        version = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        # Usa uma conexão do pool em vez de abrir uma nova a cada chamada
+        if db.engine.dialect.name == 'postgresql':
+            version = db.session.execute(db.text('SELECT version()')).scalar()
+        else:
+            version = 'SQLite ' + db.session.execute(db.text('SELECT sqlite_version()')).scalar()
         
         return jsonify({
             'status': 'success',
-            'postgresql_version': version[0],
-            'connection': 'direct_connection_ok'
+            'database_version': version,
+            'connection': 'pool_connection_ok',
+            'pool': pool_state()
         }), 200
         
     except Exception as e:
@@ -307,36 +1649,42 @@ def debug_connection():
 
 # Rotas da API
 @app.route('/api/categories', methods=['GET'])
+@conditional_get('categories', max_age=300)
 def get_categories():
     try:
-        categories = Category.query.all()
-        return jsonify([category.to_dict() for category in categories]), 200
+        return jsonify(list_categories()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/cities', methods=['GET'])
+@conditional_get('cities', max_age=300)
 def get_cities():
     try:
-        cities = City.query.all()
-        return jsonify([city.to_dict() for city in cities]), 200
+        return jsonify(list_cities()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/businesses', methods=['GET'])
+@conditional_get('businesses', 'cities', 'categories', max_age=30)
 def get_businesses():
     try:
         # Filtros
         city_id = request.args.get('city_id')
         category_id = request.args.get('category_id')
         search = request.args.get('search', '')
+        min_rating = request.args.get('min_rating', type=float)
+        sort = request.args.get('sort', '')  # rating, recent
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 12))
         
-        # Query base com joins para incluir city e category
-        query = User.query.filter_by(is_active=True).options(
-            db.joinedload(User.city),
-            db.joinedload(User.category)
-        )
+        fields = requested_fields(BUSINESS_FIELDS)
+        listing_format = request.args.get('format', 'full')  # full, normalized
+        if listing_format not in ('full', 'normalized'):
+            return jsonify({'error': 'Formato deve ser full ou normalized'}), 400
+        normalized = listing_format == 'normalized'
+        
+        # Query base; city/category (joins) e demais colunas só se pedidos em ?fields=
+        query = User.query.filter_by(is_active=True)
         
         # Aplicar filtros
         if city_id:
@@ -344,12 +1692,41 @@ def get_businesses():
         if category_id:
             query = query.filter_by(category_id=category_id)
         if search:
-            query = query.filter(
-                db.or_(
-                    User.business_name.contains(search),
-                    User.description.contains(search)
-                )
+            # Relevância só quando não há ordenação explícita nem cursor
+            query = apply_search(query, search, rank=not sort and 'cursor' not in request.args)
+        if min_rating is not None:
+            query = query.filter(User.rating_avg >= min_rating)
+        
+        # Ordenação
+        if sort == 'rating':
+            order = [(User.rating_avg, True), (User.id, False)]
+        elif sort == 'recent':
+            order = [(User.created_at, True), (User.id, True)]
+        else:
+            order = [(User.id, False)]
+        
+        query = query.options(*projection_options(
+            User, BUSINESS_FIELDS, normalized_fields(fields) if normalized else fields,
+            BUSINESS_RELATIONSHIPS, [column for column, _ in order]
+        ))
+        
+        # Paginação por cursor (opcional)
+        if 'cursor' in request.args:
+            items, next_cursor, total = keyset_paginate(
+                query, order, request.args.get('cursor'), per_page,
+                with_total=request.args.get('count') == '1'
             )
+            result = business_listing(items, fields, normalized)
+            result['next_cursor'] = next_cursor
+            if total is not None:
+                result['total'] = total
+            return jsonify(result), 200
+        
+        if sort:
+            query = query.order_by(*[column.desc() if descending else column for column, descending in order])
+        elif not search:
+            # Ordem estável entre páginas (sem ORDER BY o plano escolhido, ex. índice coberto, decide a ordem)
+            query = query.order_by(User.id)
         
         # Paginação
         businesses = query.paginate(
@@ -358,27 +1735,126 @@ def get_businesses():
             error_out=False
         )
         
+        result = business_listing(businesses.items, fields, normalized)
+        result.update(total=businesses.total, pages=businesses.pages, current_page=page)
+        return jsonify(result), 200
+        
+    except InvalidCursor:
+        return jsonify({'error': 'Cursor inválido'}), 400
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def nearby_filter(latitude, longitude, distance):
+    """Candidatos a /nearby: só as células do geohash que cobrem o raio (range scan no índice)"""
+    ranges = map(geo.cell_range, geo.covering_cells(latitude, longitude, distance))
+    return db.or_(*[
+        db.and_(User.geohash >= start, User.geohash < end) if end else User.geohash >= start
+        for start, end in ranges
+    ])
+
+@app.route('/api/businesses/nearby', methods=['GET'])
+def get_nearby_businesses():
+    """Estabelecimentos dentro do raio (km), ordenados por distância"""
+    try:
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lng', type=float)
+        if latitude is None or longitude is None:
+            return jsonify({'error': 'Parâmetros lat e lng são obrigatórios'}), 400
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({'error': 'Coordenadas fora do intervalo válido'}), 400
+        
+        distance = min(max(request.args.get('distance', 5, type=float), 0.1), 100)
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        category_id = request.args.get('category_id', type=int)
+        fields = requested_fields(BUSINESS_FIELDS)
+        
+        query = User.query.filter(User.is_active == True, nearby_filter(latitude, longitude, distance)).options(*projection_options(
+            User, BUSINESS_FIELDS, fields, BUSINESS_RELATIONSHIPS, [User.latitude, User.longitude]
+        ))
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        
+        nearby = []
+        for business in query:
+            business_distance = geo.haversine(latitude, longitude, business.latitude, business.longitude)
+            if business_distance <= distance:
+                nearby.append((business_distance, business))
+        nearby.sort(key=lambda item: (item[0], item[1].id))
+        
+        result = []
+        for business_distance, business in nearby[:limit]:
+            data = business.to_dict(fields)
+            data['distance'] = round(business_distance, 3)
+            result.append(data)
+        
+        return jsonify(result), 200
+        
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/businesses/clusters', methods=['GET'])
+def get_business_clusters():
+    """Clusters pré-agregados (quantidade, centróide, melhor avaliado) por célula da grade no zoom pedido"""
+    try:
+        try:
+            south, west, north, east = [float(value) for value in request.args.get('bbox', '').split(',')]
+        except ValueError:
+            return jsonify({'error': 'Parâmetro bbox deve ser sul,oeste,norte,leste'}), 400
+        if not (-90 <= south <= north <= 90 and -180 <= west <= east <= 180):
+            return jsonify({'error': 'bbox fora do intervalo válido'}), 400
+        
+        zoom = min(max(request.args.get('zoom', 12, type=int), 0), 22)
+        
+        ensure_memory_index('clusters', build_cluster_index, ('businesses',))
+        precision, clusters = cluster_index.clusters(south, west, north, east, zoom_to_precision(zoom))
+        
         return jsonify({
-            'businesses': [business.to_dict() for business in businesses.items],
-            'total': businesses.total,
-            'pages': businesses.pages,
-            'current_page': page
+            'zoom': zoom,
+            'precision': precision,
+            'total': sum(cluster['count'] for cluster in clusters),
+            'clusters': clusters
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/businesses/<int:business_id>', methods=['GET'])
+@conditional_get('businesses', 'cities', 'categories', max_age=30)
 def get_business(business_id):
     try:
+        fields = requested_fields(BUSINESS_FIELDS)
         business = User.query.filter_by(id=business_id, is_active=True).options(
-            db.joinedload(User.city),
-            db.joinedload(User.category)
+            *projection_options(User, BUSINESS_FIELDS, fields, BUSINESS_RELATIONSHIPS)
         ).first()
         if not business:
             return jsonify({'error': 'Estabelecimento não encontrado'}), 404
         
-        return jsonify(business.to_dict()), 200
+        return jsonify(business.to_dict(fields)), 200
+        
+    except InvalidFields as e:
+        return invalid_fields_response(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/autocomplete', methods=['GET'])
+def autocomplete():
+    """Sugestões por prefixo (estabelecimentos, categorias e cidades), servidas da memória"""
+    try:
+        q = request.args.get('q', '')
+        limit = min(request.args.get('limit', 5, type=int), 20)
+        
+        ensure_memory_index('autocomplete', build_autocomplete_index)
+        results = autocomplete_index.search(q, limit=limit)
+        
+        return jsonify({
+            'businesses': results.get('business', []),
+            'categories': results.get('category', []),
+            'cities': results.get('city', [])
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -413,14 +1889,24 @@ def register():
         )
         user.set_password(data['password'])
         
+        location_error = apply_location(user, data)
+        if location_error:
+            return jsonify({'error': location_error}), 400
+        
         db.session.add(user)
+        index_business(user)
+        apply_business_count(user.city_id, user.category_id, 1)
+        mark_changed('businesses')
         db.session.commit()
+        sync_business_indexes(user)
         
         return jsonify({
             'message': 'Estabelecimento cadastrado com sucesso!',
             'user': user.to_dict()
         }), 201
         
+    except PoolBusy:
+        return password_pool_busy()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -447,38 +1933,50 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'Conta desativada. Entre em contato com o suporte'}), 401
         
+        # Regravar o hash se o método/custo configurado mudou
+        if password_hasher.needs_rehash(user.password_hash):
+            user.set_password(data['password'])
+            db.session.commit()
+        
         # Retornar dados do usuário (sem token JWT por simplicidade)
         return jsonify({
             'message': 'Login realizado com sucesso!',
             'user': user.to_dict(),
-            'access_token': f'simple_token_{user.id}_{user.email}'  # Token simples para compatibilidade
+            'access_token': token_signer.issue(user.id, 'business'),
+            'expires_in': token_signer.ttl
         }), 200
         
+    except PoolBusy:
+        return password_pool_busy()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/logout', methods=['POST'])
+@token_required()
+def logout():
+    """Revoga o token atual (estabelecimento ou admin)"""
+    try:
+        revoke_token(g.token_claims)
+        return jsonify({'message': 'Logout realizado com sucesso'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/profile', methods=['PUT'])
+@token_required('business')
 def update_profile():
     """Atualizar dados do estabelecimento"""
     try:
         data = request.get_json()
         
-        # Extrair ID do usuário do token simples
-        auth_header = request.headers.get('Authorization', '')
-        if not auth_header.startswith('Bearer simple_token_'):
-            return jsonify({'error': 'Token inválido'}), 401
-        
-        try:
-            token_parts = auth_header.replace('Bearer simple_token_', '').split('_')
-            user_id = int(token_parts[0])
-        except:
-            return jsonify({'error': 'Token inválido'}), 401
-        
-        # Buscar usuário
-        user = User.query.get(user_id)
+        # Buscar usuário do token (já verificado pelo decorator)
+        user = User.query.get(int(g.token_claims['sub']))
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
+        old_state = business_count_state(user)
+        
         # Atualizar campos se fornecidos
         if 'business_name' in data:
             user.business_name = data['business_name']
@@ -497,8 +1995,18 @@ def update_profile():
         if 'category_id' in data:
             user.category_id = data['category_id']
         
+        location_error = apply_location(user, data)
+        if location_error:
+            db.session.rollback()
+            return jsonify({'error': location_error}), 400
+        
+        sync_business_counts(old_state, user)
+        index_business(user)
+        mark_changed('businesses')
+        
         # Salvar no banco
         db.session.commit()
+        sync_business_indexes(user)
         
         return jsonify({
             'message': 'Dados atualizados com sucesso!',
@@ -541,7 +2049,10 @@ def create_review():
         )
         
         db.session.add(review)
+        apply_review_rating(review.business_id, rating, 1)
+        mark_changed('reviews')
         db.session.commit()
+        sync_business_indexes(business)
         
         return jsonify({
             'message': 'Avaliação criada com sucesso!',
@@ -552,6 +2063,7 @@ def create_review():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/reviews/<int:business_id>', methods=['GET'])
+@conditional_get('reviews', 'businesses', max_age=30)
 def get_reviews(business_id):
     try:
         # Verificar se o estabelecimento existe
@@ -576,21 +2088,7 @@ def get_reviews(business_id):
 
 def admin_required(f):
     """Decorator para verificar se o usuário é admin"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Verificar token de autenticação
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'error': 'Token de acesso requerido'}), 401
-        
-        token = auth_header.split(' ')[1]
-        
-        # Verificar se é o token de admin válido
-        if token != 'admin_token_123':
-            return jsonify({'error': 'Token de admin inválido'}), 403
-        
-        return f(*args, **kwargs)
-    return decorated_function
+    return token_required('admin')(f)
 
 @app.route('/api/admin/login', methods=['POST'])
 def admin_login():
@@ -612,7 +2110,8 @@ def admin_login():
             }
             return jsonify({
                 'message': 'Login admin realizado com sucesso',
-                'token': 'admin_token_123',
+                'token': token_signer.issue(user_data['id'], 'admin'),
+                'expires_in': token_signer.ttl,
                 'user': user_data
             }), 200
         else:
@@ -621,34 +2120,145 @@ def admin_login():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def dashboard_stats():
+    """Contagens do dashboard em uma única consulta (agregados condicionais em subconsultas escalares)"""
+    def count(model, *conditions):
+        column = db.func.count(db.case((db.and_(*conditions), 1))) if conditions else db.func.count()
+        return db.select(column).select_from(model).scalar_subquery()
+    
+    row = db.session.query(
+        count(User),
+        count(User, User.is_active == True),
+        count(Review),
+        count(Review, Review.is_approved == False),
+        count(City),
+        count(Category)
+    ).one()
+    total_users, active_users, total_reviews, pending_reviews, total_cities, total_categories = row
+    
+    return {
+        'total_users': total_users,
+        'active_users': active_users,
+        'inactive_users': total_users - active_users,
+        'total_reviews': total_reviews,
+        'pending_reviews': pending_reviews,
+        'approved_reviews': total_reviews - pending_reviews,
+        'total_cities': total_cities,
+        'total_categories': total_categories
+    }
+
+def daily_counts(column, since):
+    """{'AAAA-MM-DD': quantidade} agrupado no banco, usando o índice de created_at"""
+    day = db.func.date(column)
+    rows = db.session.query(day, db.func.count()).filter(column >= since).group_by(day)
+    return {str(date): total for date, total in rows}
+
+def dashboard_series(days):
+    """Cadastros e avaliações por dia nos últimos `days` dias (dias sem registros com 0)"""
+    today = datetime.datetime.utcnow().date()
+    first_day = today - datetime.timedelta(days=days - 1)
+    since = datetime.datetime.combine(first_day, datetime.time.min)
+    
+    registrations = daily_counts(User.created_at, since)
+    reviews = daily_counts(Review.created_at, since)
+    
+    dates = [(first_day + datetime.timedelta(days=offset)).isoformat() for offset in range(days)]
+    return {
+        'dates': dates,
+        'registrations': [registrations.get(date, 0) for date in dates],
+        'reviews': [reviews.get(date, 0) for date in dates]
+    }
+
 @app.route('/api/admin/dashboard', methods=['GET'])
 @admin_required
 def admin_dashboard():
     try:
-        # Estatísticas gerais
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
-        total_reviews = Review.query.count()
-        pending_reviews = Review.query.filter_by(is_approved=False).count()
-        total_cities = City.query.count()
-        total_categories = Category.query.count()
+        days = min(max(request.args.get('days', 30, type=int), 1), 365)
         
-        return jsonify({
-            'stats': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'inactive_users': total_users - active_users,
-                'total_reviews': total_reviews,
-                'pending_reviews': pending_reviews,
-                'approved_reviews': total_reviews - pending_reviews,
-                'total_cities': total_cities,
-                'total_categories': total_categories
-            }
-        }), 200
+        result = dashboard_cache.get_or_set(f'dashboard:{days}', lambda: {
+            'stats': dashboard_stats(),
+            'series': dashboard_series(days)
+        })
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/cache', methods=['GET'])
+@admin_required
+def admin_cache_stats():
+    return jsonify({
+        'reference_cache': reference_cache.stats(),
+        'dashboard_cache': dashboard_cache.stats(),
+        'response_cache': response_cache.stats()
+    }), 200
+
+@app.route('/api/admin/sql-stats', methods=['GET', 'DELETE'])
+@admin_required
+def admin_sql_stats():
+    """Statements e tempo de banco por endpoint desde o início do worker (DELETE zera)"""
+    if request.method == 'DELETE':
+        endpoint_stats.reset()
+    return jsonify({
+        'slow_query_ms': app.config['SLOW_QUERY_MS'],
+        'endpoints': endpoint_stats.snapshot()
+    }), 200
+
+@app.route('/api/admin/profile', methods=['GET'])
+@admin_required
+def admin_profile_list():
+    return jsonify({
+        'armed': {endpoint: {'remaining': remaining, 'mode': mode} for endpoint, (remaining, mode, _) in profiler.targets.items()},
+        'results': [
+            {key: value for key, value in result.items() if key not in ('summary', 'data')}
+            for result in reversed(profiler.results)
+        ]
+    }), 200
+
+@app.route('/api/admin/profile', methods=['POST'])
+@admin_required
+def admin_profile_arm():
+    """Arma o perfil das próximas `count` requisições de `endpoint` (modo cprofile ou sample)"""
+    try:
+        data = request.get_json() or {}
+        endpoint = data.get('endpoint')
+        if endpoint not in app.view_functions:
+            return jsonify({'error': 'Endpoint desconhecido'}), 400
+        count = int(data.get('count', 1))
+        if not 1 <= count <= 100:
+            return jsonify({'error': 'count deve estar entre 1 e 100'}), 400
+        interval = float(data.get('interval_ms', 5)) / 1000
+        profiler.arm(endpoint, count, data.get('mode', 'cprofile'), max(interval, 0.001))
+        return jsonify({'message': f'Perfil armado para {count} requisição(ões) de {endpoint}'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/admin/profile', methods=['DELETE'])
+@admin_required
+def admin_profile_clear():
+    profiler.disarm()
+    profiler.clear()
+    return jsonify({'message': 'Perfis descartados'}), 200
+
+@app.route('/api/admin/profile/<int:result_id>', methods=['GET'])
+@admin_required
+def admin_profile_result(result_id):
+    """Resultado: resumo em JSON, ?format=pstats (arquivo para pstats/snakeviz) ou ?format=collapsed (flamegraph)"""
+    result = profiler.get(result_id)
+    if result is None:
+        return jsonify({'error': 'Perfil não encontrado'}), 404
+    
+    output_format = request.args.get('format', 'summary')
+    if output_format == 'pstats' and result['mode'] == 'cprofile':
+        response = Response(result['data'], mimetype='application/octet-stream')
+        response.headers['Content-Disposition'] = f'attachment; filename=profile-{result_id}.prof'
+        return response
+    if output_format == 'collapsed' and result['mode'] == 'sample':
+        return Response(result['data'], mimetype='text/plain')
+    if output_format != 'summary':
+        return jsonify({'error': 'Formato indisponível para este perfil'}), 400
+    return jsonify({key: value for key, value in result.items() if key != 'data'}), 200
+
 # CRUD Usuários
 @app.route('/api/admin/users', methods=['GET'])
 @admin_required
@@ -657,27 +2267,39 @@ def admin_get_users():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         search = request.args.get('search', '')
+        fields = requested_fields(BUSINESS_FIELDS)
         
-        query = User.query
+        query = User.query.options(*projection_options(User, BUSINESS_FIELDS, fields, BUSINESS_RELATIONSHIPS))
         
         if search:
-            query = query.filter(
-                db.or_(
-                    User.business_name.contains(search),
-                    User.owner_name.contains(search),
-                    User.email.contains(search)
-                )
+            query = apply_search(query, search, extra_columns=(User.owner_name, User.email))
+        
+        if 'cursor' in request.args:
+            items, next_cursor, total = keyset_paginate(
+                query, [(User.id, False)], request.args.get('cursor'), per_page,
+                with_total=request.args.get('count') == '1'
             )
+            result = {
+                'users': [user.to_dict(fields) for user in items],
+                'next_cursor': next_cursor
+            }
+            if total is not None:
+                result['total'] = total
+            return jsonify(result), 200
         
         users = query.paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
-            'users': [user.to_dict() for user in users.items],
+            'users': [user.to_dict(fields) for user in users.items],
             'total': users.total,
             'pages': users.pages,
             'current_page': page
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Cursor inválido'}), 400
+    except InvalidFields as e:
+        return invalid_fields_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -687,6 +2309,8 @@ def admin_update_user(user_id):
     try:
         user = User.query.get_or_404(user_id)
         data = request.get_json()
+        old_state = business_count_state(user)
+        was_active = user.is_active
         
         # Atualizar campos permitidos
         if 'is_active' in data:
@@ -708,7 +2332,20 @@ def admin_update_user(user_id):
         if 'category_id' in data:
             user.category_id = data['category_id']
         
+        location_error = apply_location(user, data)
+        if location_error:
+            db.session.rollback()
+            return jsonify({'error': location_error}), 400
+        
+        sync_business_counts(old_state, user)
+        index_business(user)
+        mark_changed('businesses')
+        # Conta desativada: os tokens já emitidos deixam de valer (login já recusa contas inativas)
+        revocation = stage_user_tokens_revocation(user.id) if was_active and not user.is_active else None
         db.session.commit()
+        sync_business_indexes(user)
+        if revocation:
+            apply_tokens_revocation(revocation)
         
         return jsonify({
             'message': 'Usuário atualizado com sucesso',
@@ -727,9 +2364,17 @@ def admin_delete_user(user_id):
         # Deletar avaliações relacionadas
         Review.query.filter_by(business_id=user_id).delete()
         
+        if user.is_active:
+            apply_business_count(user.city_id, user.category_id, -1)
+        unindex_business(user.id)
+        mark_changed('businesses', 'reviews')
+        revocation = stage_user_tokens_revocation(user_id)
+        
         # Deletar usuário
         db.session.delete(user)
         db.session.commit()
+        remove_business_indexes(user_id)
+        apply_tokens_revocation(revocation)
         
         return jsonify({'message': 'Usuário deletado com sucesso'}), 200
         
@@ -741,8 +2386,7 @@ def admin_delete_user(user_id):
 @admin_required
 def admin_get_cities():
     try:
-        cities = City.query.all()
-        return jsonify([city.to_dict() for city in cities]), 200
+        return jsonify(list_cities()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -766,7 +2410,9 @@ def admin_create_city():
         )
         
         db.session.add(city)
+        mark_changed('cities')
         db.session.commit()
+        autocomplete_sync_reference('city', city)
         
         return jsonify({
             'message': 'Cidade criada com sucesso',
@@ -788,7 +2434,9 @@ def admin_update_city(city_id):
         if 'state' in data:
             city.state = data['state']
         
+        mark_changed('cities', 'businesses')
         db.session.commit()
+        autocomplete_sync_reference('city', city)
         
         return jsonify({
             'message': 'Cidade atualizada com sucesso',
@@ -810,7 +2458,9 @@ def admin_delete_city(city_id):
             return jsonify({'error': f'Não é possível deletar. {users_count} estabelecimentos usam esta cidade.'}), 400
         
         db.session.delete(city)
+        mark_changed('cities', 'businesses')
         db.session.commit()
+        autocomplete_sync_reference('city', None, city_id)
         
         return jsonify({'message': 'Cidade deletada com sucesso'}), 200
         
@@ -822,8 +2472,7 @@ def admin_delete_city(city_id):
 @admin_required
 def admin_get_categories():
     try:
-        categories = Category.query.all()
-        return jsonify([category.to_dict() for category in categories]), 200
+        return jsonify(list_categories()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -848,7 +2497,9 @@ def admin_create_category():
         )
         
         db.session.add(category)
+        mark_changed('categories')
         db.session.commit()
+        autocomplete_sync_reference('category', category)
         
         return jsonify({
             'message': 'Categoria criada com sucesso',
@@ -872,7 +2523,9 @@ def admin_update_category(category_id):
         if 'icon' in data:
             category.icon = data['icon']
         
+        mark_changed('categories', 'businesses')
         db.session.commit()
+        autocomplete_sync_reference('category', category)
         
         return jsonify({
             'message': 'Categoria atualizada com sucesso',
@@ -894,7 +2547,9 @@ def admin_delete_category(category_id):
             return jsonify({'error': f'Não é possível deletar. {users_count} estabelecimentos usam esta categoria.'}), 400
         
         db.session.delete(category)
+        mark_changed('categories', 'businesses')
         db.session.commit()
+        autocomplete_sync_reference('category', None, category_id)
         
         return jsonify({'message': 'Categoria deletada com sucesso'}), 200
         
@@ -909,25 +2564,45 @@ def admin_get_reviews():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         status = request.args.get('status', 'all')  # all, approved, pending
+        fields = requested_fields(REVIEW_FIELDS)
         
-        query = Review.query
+        query = Review.query.options(*projection_options(
+            Review, REVIEW_FIELDS, fields, extra_columns=[Review.created_at]
+        ))
         
         if status == 'approved':
             query = query.filter_by(is_approved=True)
         elif status == 'pending':
             query = query.filter_by(is_approved=False)
         
+        if 'cursor' in request.args:
+            items, next_cursor, total = keyset_paginate(
+                query, [(Review.created_at, True), (Review.id, True)], request.args.get('cursor'), per_page,
+                with_total=request.args.get('count') == '1'
+            )
+            result = {
+                'reviews': [review.to_dict(fields) for review in items],
+                'next_cursor': next_cursor
+            }
+            if total is not None:
+                result['total'] = total
+            return jsonify(result), 200
+        
         reviews = query.order_by(Review.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         return jsonify({
-            'reviews': [review.to_dict() for review in reviews.items],
+            'reviews': [review.to_dict(fields) for review in reviews.items],
             'total': reviews.total,
             'pages': reviews.pages,
             'current_page': page
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Cursor inválido'}), 400
+    except InvalidFields as e:
+        return invalid_fields_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -938,10 +2613,13 @@ def admin_update_review(review_id):
         review = Review.query.get_or_404(review_id)
         data = request.get_json()
         
-        if 'is_approved' in data:
+        if 'is_approved' in data and bool(data['is_approved']) != bool(review.is_approved):
             review.is_approved = data['is_approved']
+            apply_review_rating(review.business_id, review.rating, 1 if review.is_approved else -1)
+            mark_changed('reviews')
         
         db.session.commit()
+        sync_business_indexes(review.business)
         
         return jsonify({
             'message': 'Avaliação atualizada com sucesso',
@@ -957,14 +2635,173 @@ def admin_delete_review(review_id):
     try:
         review = Review.query.get_or_404(review_id)
         
+        if review.is_approved:
+            apply_review_rating(review.business_id, review.rating, -1)
+        mark_changed('reviews')
+        business = review.business
         db.session.delete(review)
         db.session.commit()
+        sync_business_indexes(business)
         
         return jsonify({'message': 'Avaliação deletada com sucesso'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Exportação
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+def export_columns():
+    """Colunas exportáveis por recurso (nome no arquivo -> expressão SQL)"""
+    return {
+        'users': {
+            'id': User.id,
+            'email': User.email,
+            'business_name': User.business_name,
+            'owner_name': User.owner_name,
+            'phone': User.phone,
+            'whatsapp': User.whatsapp,
+            'address': User.address,
+            'is_active': User.is_active,
+            'created_at': User.created_at,
+            'city': City.name,
+            'state': City.state,
+            'category': Category.name,
+            'rating': User.rating_avg,
+            'review_count': User.rating_count,
+            'latitude': User.latitude,
+            'longitude': User.longitude
+        },
+        'reviews': {
+            'id': Review.id,
+            'business_id': Review.business_id,
+            'business_name': User.business_name,
+            'customer_name': Review.customer_name,
+            'customer_email': Review.customer_email,
+            'rating': Review.rating,
+            'comment': Review.comment,
+            'is_approved': Review.is_approved,
+            'created_at': Review.created_at
+        }
+    }
+
+def export_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+def stream_rows(rows, fields, export_format):
+    """Gera o arquivo em blocos de EXPORT_BATCH_SIZE linhas (memória constante)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+    
+    for count, row in enumerate(rows, 1):
+        values = [export_value(value) for value in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(fields, values)), ensure_ascii=False))
+            buffer.write('\n')
+        
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+def export_response(resource, build_query):
+    """Valida format/fields e devolve a resposta em streaming (cursor no servidor via yield_per)"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Formato deve ser csv ou ndjson'}), 400
+    
+    available = export_columns()[resource]
+    fields = [field for field in request.args.get('fields', '').split(',') if field] or list(available)
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        return jsonify({'error': f"Campos inválidos: {', '.join(unknown)}"}), 400
+    
+    query = build_query(db.session.query(*[available[field].label(field) for field in fields]))
+    rows = query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    filename = f"{resource}-{datetime.datetime.utcnow():%Y%m%d}.{export_format}"
+    return Response(
+        stream_with_context(stream_rows(rows, fields, export_format)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/admin/export/users', methods=['GET'])
+@admin_required
+def admin_export_users():
+    try:
+        return export_response('users', lambda query: query.select_from(User).outerjoin(
+            City, User.city_id == City.id
+        ).outerjoin(
+            Category, User.category_id == Category.id
+        ).order_by(User.id))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/export/reviews', methods=['GET'])
+@admin_required
+def admin_export_reviews():
+    try:
+        status = request.args.get('status', 'all')  # all, approved, pending
+        
+        def build_query(query):
+            query = query.select_from(Review).outerjoin(User, Review.business_id == User.id)
+            if status == 'approved':
+                query = query.filter(Review.is_approved == True)
+            elif status == 'pending':
+                query = query.filter(Review.is_approved == False)
+            return query.order_by(Review.id)
+        
+        return export_response('reviews', build_query)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/import/businesses', methods=['POST'])
+@admin_required
+def admin_import_businesses():
+    """Importa estabelecimentos de um arquivo (multipart 'file') ou de uma lista JSON no corpo"""
+    try:
+        upload = request.files.get('file')
+        try:
+            if upload:
+                file_format = request.args.get('format') or importer.detect_format(upload.filename)
+                records = importer.read_records(upload.stream, file_format)
+            else:
+                records = request.get_json(silent=True)
+                if not isinstance(records, list):
+                    return jsonify({'error': 'Envie um arquivo (campo file) ou uma lista JSON'}), 400
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Senhas passam pelo pool de hashing do servidor; arquivos com muitas vão pela linha de comando
+        passwords = sum(1 for record in records if isinstance(record, dict) and importer.clean(record.get('password')))
+        if passwords > app.config['IMPORT_MAX_PASSWORDS']:
+            return jsonify({
+                'error': f"Arquivo com {passwords} senhas (máximo {app.config['IMPORT_MAX_PASSWORDS']} por requisição); "
+                         f"use flask --app main import-businesses"
+            }), 413
+        
+        batch_size = min(max(request.args.get('batch_size', 1000, type=int), 1), 10000)
+        report = import_businesses(records, batch_size, hash_password=password_hasher.hash)
+        return jsonify(report.to_dict()), 200
+        
+    except PoolBusy:
+        return password_pool_busy()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 def create_initial_data():
     """Criar dados iniciais"""
     try:
@@ -1024,7 +2861,7 @@ if __name__ == '__main__':
     with app.app_context():
         try:
             print("🔄 Inicializando banco de dados...")
-            db.create_all()
+            upgrade_database()
             print("✅ Tabelas criadas/verificadas")
             
             create_initial_data()
@@ -0,0 +1,190 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """Contadores, gauges e histogramas no formato de exposição do Prometheus, sem dependências
+
+    Cada thread escreve no seu próprio shard (dict), então inc/observe não
+    disputam lock; os shards só são somados na coleta. Com `directory`, cada
+    worker grava periodicamente seu snapshot em <directory>/metrics-<pid>.json
+    e a coleta soma os arquivos de todos os workers (gauges só dos vivos).
+    """
+
+    def __init__(self, directory=None, flush_interval=5, buckets=DEFAULT_BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._definitions = {}  # nome -> (tipo, ajuda)
+        self._callbacks = []
+        self._local = threading.local()
+        self._shards = []       # (thread, (valores, histogramas))
+        self._retired = ({}, {})
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def describe(self, name, kind, help):
+        """Declara uma métrica: kind é 'counter', 'gauge' ou 'histogram'"""
+        self._definitions[name] = (kind, help)
+
+    def register_callback(self, callback):
+        """callback() -> iterável de (nome, labels, valor), lido a cada coleta (gauges de pool, caches...)"""
+        self._callbacks.append(callback)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        """Soma em um contador (ou gauge, com valor negativo para decrementar)"""
+        values = self._shard()[0]
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        histograms = self._shard()[1]
+        key = (name, labels)
+        counts = histograms.get(key)
+        if counts is None:
+            counts = histograms[key] = [0] * (len(self.buckets) + 3)  # buckets, +Inf, soma, total
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def collect(self):
+        """Snapshot deste worker: (valores, histogramas) com chave (nome, labels)"""
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    merge(self._retired, shard)  # thread encerrada: o shard é incorporado e descartado
+            self._shards = alive
+            snapshot = (dict(self._retired[0]), {key: list(counts) for key, counts in self._retired[1].items()})
+            for _, shard in alive:
+                merge(snapshot, (dict(shard[0]), {key: list(counts) for key, counts in dict(shard[1]).items()}))
+
+        for callback in self._callbacks:
+            for name, labels, value in callback():
+                snapshot[0][(name, labels)] = value
+        return snapshot
+
+    def maybe_flush(self):
+        """Grava o snapshot deste worker se flush_interval já passou desde a última gravação"""
+        if self.directory and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self, snapshot=None):
+        if not self.directory:
+            return
+        self._flushed_at = time.monotonic()
+        values, histograms = snapshot or self.collect()
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump({
+                'pid': os.getpid(),
+                'values': [[name, labels, value] for (name, labels), value in values.items()],
+                'histograms': [[name, labels, counts] for (name, labels), counts in histograms.items()]
+            }, file)
+        os.replace(temporary, path)  # troca atômica: quem lê nunca vê arquivo pela metade
+
+    def aggregate(self):
+        """Snapshot somado de todos os workers (ou só deste, sem directory)"""
+        snapshot = self.collect()
+        if not self.directory:
+            return snapshot
+        self.flush(snapshot)
+
+        total = ({}, {})
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                with open(path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            alive = data['pid'] == os.getpid() or process_alive(data['pid'])
+            values = {
+                (name, tuple(map(tuple, labels))): value for name, labels, value in data['values']
+                if alive or self._definitions.get(name, ('counter',))[0] != 'gauge'
+            }
+            histograms = {(name, tuple(map(tuple, labels))): counts for name, labels, counts in data['histograms']}
+            merge(total, (values, histograms))
+        return total
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)"""
+        values, histograms = self.aggregate()
+        series = {}
+        for (name, labels), value in values.items():
+            series.setdefault(name, []).append((labels, value))
+        for (name, labels), counts in histograms.items():
+            series.setdefault(name, []).append((labels, counts))
+
+        lines = []
+        for name in sorted(series):
+            kind, help = self._definitions.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(series[name]):
+                if kind != 'histogram':
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), value):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else format_value(bound)
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {format_value(value[-2])}')
+                lines.append(f'{name}_count{format_labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def merge(target, source):
+    """Soma um snapshot (valores, histogramas) em outro"""
+    for key, value in source[0].items():
+        target[0][key] = target[0].get(key, 0) + value
+    for key, counts in source[1].items():
+        current = target[1].get(key)
+        if current is None:
+            target[1][key] = list(counts)
+        else:
+            for i, count in enumerate(counts):
+                current[i] += count
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # existe, mas é de outro usuário
+        pass
+    return True
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels) + '}'
+
+
+def format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,201 @@
+import datetime
+
+from sqlalchemy import inspect, text
+
+from search import build_document
+
+# Migrações versionadas do schema (SQLite e PostgreSQL)
+#
+# Cada migração é uma função upgrade(conn, metadata) idempotente, executada em
+# sua própria transação e registrada em schema_migrations. Bancos criados com
+# create_all() antes deste módulo passam pelas mesmas etapas: o que já existe
+# é pulado e só as colunas/índices que faltam são criados.
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def decorator(upgrade):
+        MIGRATIONS.append((version, description, upgrade))
+        return upgrade
+    return decorator
+
+
+def column_names(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, name, ddl):
+    """ALTER TABLE ... ADD COLUMN, se a coluna ainda não existir"""
+    if name in column_names(conn, table):
+        return False
+    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+    return True
+
+
+def create_index(conn, name, table, columns):
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+
+
+def create_tables(conn, metadata, *names):
+    metadata.create_all(conn, tables=[metadata.tables[name] for name in names], checkfirst=True)
+
+
+# =====================================================
+# MIGRAÇÕES
+# =====================================================
+
+@migration('0001', 'Tabelas base (categories, cities, users, reviews)')
+def baseline(conn, metadata):
+    create_tables(conn, metadata, 'categories', 'cities', 'users', 'reviews')
+
+
+@migration('0002', 'Agregados de avaliação em users')
+def rating_aggregates(conn, metadata):
+    added = add_column(conn, 'users', 'rating_sum', 'INTEGER NOT NULL DEFAULT 0')
+    add_column(conn, 'users', 'rating_count', 'INTEGER NOT NULL DEFAULT 0')
+    add_column(conn, 'users', 'rating_avg', 'FLOAT NOT NULL DEFAULT 0')
+    create_index(conn, 'ix_users_rating_avg', 'users', 'rating_avg')
+
+    if added:
+        conn.execute(text("""
+            UPDATE users SET
+                rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM reviews
+                              WHERE business_id = users.id AND is_approved = :approved),
+                rating_count = (SELECT COUNT(id) FROM reviews
+                                WHERE business_id = users.id AND is_approved = :approved),
+                rating_avg = (SELECT COALESCE(AVG(rating), 0) FROM reviews
+                              WHERE business_id = users.id AND is_approved = :approved)
+        """), {'approved': True})
+
+
+@migration('0003', 'Contador de estabelecimentos em categories e cities')
+def business_counts(conn, metadata):
+    for table, column in (('categories', 'category_id'), ('cities', 'city_id')):
+        if add_column(conn, table, 'business_count', 'INTEGER NOT NULL DEFAULT 0'):
+            conn.execute(text(f"""
+                UPDATE {table} SET business_count = (
+                    SELECT COUNT(id) FROM users WHERE users.{column} = {table}.id AND users.is_active = :active
+                )
+            """), {'active': True})
+
+
+@migration('0004', 'Tabela data_versions (ETag/Last-Modified)')
+def data_versions(conn, metadata):
+    create_tables(conn, metadata, 'data_versions')
+
+
+@migration('0005', 'Documento e índice de busca textual')
+def search_index(conn, metadata):
+    added = add_column(conn, 'users', 'search_document', 'TEXT')
+
+    fts5 = False
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_users_search_document ON users "
+            "USING GIN (to_tsvector('simple'::regconfig, coalesce(search_document, '')))"
+        ))
+    elif conn.dialect.name == 'sqlite':
+        try:
+            with conn.begin_nested():
+                conn.execute(text('CREATE VIRTUAL TABLE IF NOT EXISTS business_search USING fts5(document)'))
+            fts5 = True
+        except Exception as e:
+            print(f"⚠️ FTS5 indisponível, busca sem índice: {e}")
+
+    if not added and not fts5:
+        return
+
+    rows = conn.execute(text('SELECT id, business_name, description FROM users')).all()
+    documents = [{'id': id, 'document': build_document(name, description)} for id, name, description in rows]
+    if documents:
+        conn.execute(text('UPDATE users SET search_document = :document WHERE id = :id'), documents)
+        if fts5:
+            conn.execute(text('DELETE FROM business_search'))
+            conn.execute(text('INSERT INTO business_search(rowid, document) VALUES (:id, :document)'), documents)
+
+
+@migration('0006', 'Coordenadas e geohash dos estabelecimentos')
+def geolocation(conn, metadata):
+    add_column(conn, 'users', 'latitude', 'FLOAT')
+    add_column(conn, 'users', 'longitude', 'FLOAT')
+    add_column(conn, 'users', 'geohash', 'VARCHAR(12)')
+    create_index(conn, 'ix_users_geohash', 'users', 'geohash')
+
+
+@migration('0007', 'Índices compostos dos filtros de listagem e avaliações')
+def filter_indexes(conn, metadata):
+    # Listagem pública: is_active + cidade e/ou categoria
+    create_index(conn, 'ix_users_active_city_category', 'users', 'is_active, city_id, category_id')
+    create_index(conn, 'ix_users_active_category', 'users', 'is_active, category_id')
+    # Avaliações aprovadas de um estabelecimento, mais recentes primeiro
+    create_index(conn, 'ix_reviews_business_approved_created', 'reviews', 'business_id, is_approved, created_at DESC')
+    # Moderação no admin: por status e/ou data
+    create_index(conn, 'ix_reviews_approved_created', 'reviews', 'is_approved, created_at, id')
+    create_index(conn, 'ix_reviews_created', 'reviews', 'created_at, id')
+
+
+@migration('0008', 'Índice de users.created_at (série de cadastros do dashboard)')
+def users_created_index(conn, metadata):
+    create_index(conn, 'ix_users_created_at', 'users', 'created_at')
+
+
+@migration('0009', 'Tabela revoked_tokens (logout de tokens assinados)')
+def revoked_tokens(conn, metadata):
+    create_tables(conn, metadata, 'revoked_tokens')
+
+
+@migration('0010', 'Índices de ordenação por avaliação, por cidade e de geohash com is_active')
+def active_rating_geohash_indexes(conn, metadata):
+    # Sem eles, os índices de 0007 que começam por is_active são escolhidos para
+    # sort=rating (ordena todos os ativos) e para /nearby (lê todos os ativos)
+    create_index(conn, 'ix_users_active_rating', 'users', 'is_active, rating_avg DESC, id')
+    create_index(conn, 'ix_users_active_geohash', 'users', 'is_active, geohash')
+    # Listagem só por cidade já na ordem padrão (id), sem ordenar a cidade inteira
+    create_index(conn, 'ix_users_active_city', 'users', 'is_active, city_id, id')
+
+
+# =====================================================
+# EXECUÇÃO
+# =====================================================
+
+def ensure_version_table(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version VARCHAR(20) PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)'
+    ))
+
+
+def applied_versions(engine):
+    """Versões já aplicadas; só leitura (sem schema_migrations, nenhuma foi aplicada)"""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table('schema_migrations'):
+            return set()
+        return {version for (version,) in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [(version, description) for version, description, _ in MIGRATIONS if version not in applied]
+
+
+def upgrade(engine, metadata, target=None):
+    """Aplica em ordem as migrações pendentes (até target, se informado); retorna as versões aplicadas"""
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+    applied = applied_versions(engine)
+    done = []
+    for version, description, upgrade_step in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            upgrade_step(conn, metadata)
+            conn.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)'),
+                {'v': version, 'd': description, 't': datetime.datetime.utcnow()}
+            )
+        print(f"✅ Migração {version} aplicada: {description}")
+        done.append(version)
+    return done
@@ -0,0 +1,74 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class PoolBusy(Exception):
+    """Fila de hashing cheia: a requisição deve ser recusada (503) em vez de esperar"""
+
+
+def canonical_method(method):
+    """Método com todos os parâmetros explícitos, no formato do prefixo gravado no hash"""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']  # n, r, p
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+class PasswordHasher:
+    """Hash e verificação de senha em um pool de threads limitado
+
+    scrypt/pbkdf2 liberam o GIL, então `workers` threads limitam quantos núcleos
+    o hashing ocupa. Além delas, no máximo `max_queue` chamadas esperam na fila;
+    as seguintes recebem PoolBusy imediatamente.
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_queue=16):
+        self.method = canonical_method(method)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy()
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True se o hash foi gerado com outro método/custo que o configurado"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'rejected': self.rejected
+            }
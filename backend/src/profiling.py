@@ -0,0 +1,132 @@
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+MODES = ('cprofile', 'sample')
+
+
+class Sampler:
+    """Amostra a pilha de uma thread a cada `interval` segundos, acumulando pilhas no formato collapsed"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """Uma linha "raiz;...;folha contagem" por pilha (flamegraph.pl, speedscope)"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Perfil sob demanda das próximas N requisições de um endpoint, com resultados em buffer circular
+
+    Desarmado, o custo por requisição é checar se `targets` está vazio. Cada
+    worker tem o seu: o perfil só vale para as requisições que o worker atender.
+    """
+
+    def __init__(self, capacity=20):
+        self.targets = {}  # endpoint -> [restantes, modo, intervalo]
+        self.results = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def arm(self, endpoint, count=1, mode='cprofile', interval=0.005):
+        if mode not in MODES:
+            raise ValueError(f'Modo deve ser um de: {", ".join(MODES)}')
+        with self._lock:
+            self.targets[endpoint] = [count, mode, interval]
+
+    def disarm(self, endpoint=None):
+        with self._lock:
+            if endpoint is None:
+                self.targets.clear()
+            else:
+                self.targets.pop(endpoint, None)
+
+    def start(self, endpoint):
+        """Inicia o perfil se o endpoint estiver armado; devolve a sessão ou None"""
+        with self._lock:
+            target = self.targets.get(endpoint)
+            if target is None:
+                return None
+            target[0] -= 1
+            if target[0] <= 0:
+                del self.targets[endpoint]
+            mode, interval = target[1], target[2]
+
+        if mode == 'sample':
+            collector = Sampler(threading.get_ident(), interval)
+            collector.start()
+        else:
+            collector = cProfile.Profile()
+            try:
+                collector.enable()
+            except ValueError:  # outro cProfile ativo (no 3.12+ só um por processo): esta requisição fica sem perfil
+                return None
+        return {'endpoint': endpoint, 'mode': mode, 'collector': collector, 'started': time.perf_counter()}
+
+    def stop(self, session, **details):
+        """Encerra a sessão e guarda o resultado no buffer"""
+        duration = time.perf_counter() - session['started']
+        collector = session['collector']
+        if session['mode'] == 'sample':
+            collector.stop()
+            data = collector.collapsed()
+            summary = ''.join(data.splitlines(keepends=True)[:30])
+        else:
+            collector.disable()
+            collector.create_stats()
+            data = marshal.dumps(collector.stats)  # mesmo formato de dump_stats / pstats.Stats(arquivo)
+            output = io.StringIO()
+            pstats.Stats(collector, stream=output).sort_stats('cumulative').print_stats(30)
+            summary = output.getvalue()
+
+        result = dict(
+            details,
+            id=next(self._ids),
+            endpoint=session['endpoint'],
+            mode=session['mode'],
+            duration_ms=round(duration * 1000, 3),
+            created_at=time.time(),
+            summary=summary,
+            data=data
+        )
+        self.results.append(result)
+        return result
+
+    def get(self, result_id):
+        for result in self.results:
+            if result['id'] == result_id:
+                return result
+        return None
+
+    def clear(self):
+        self.results.clear()
@@ -0,0 +1,58 @@
+import re
+import unicodedata
+
+# Palavras sem valor de busca (já sem acento)
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas',
+    'um', 'uma', 'para', 'por', 'com', 'sem', 'que', 'ao', 'aos', 'se', 'ou'
+}
+
+# Redução de plural (sufixo, substituição), na ordem em que são testadas
+PLURAL_RULES = [
+    ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+    ('ns', 'm'), ('les', 'l'), ('res', 'r'), ('is', 'il'), ('s', '')
+]
+
+# Diminutivos, aumentativos, advérbios e feminino mais comuns
+SUFFIX_RULES = [
+    ('issima', ''), ('issimo', ''), ('zinha', ''), ('zinho', ''), ('inha', ''), ('inho', ''),
+    ('mente', ''), ('eira', 'eir'), ('ona', 'ao')
+]
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Remove acentos e converte para minúsculas ("Farmácia" -> "farmacia")"""
+    normalized = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in normalized if not unicodedata.combining(char)).lower()
+
+
+def stem(word):
+    """Stemmer leve para português (plural, sufixos comuns e vogal temática)"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+
+    for suffix, replacement in PLURAL_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 3:
+            word = word[:-len(suffix)] + replacement
+            break
+
+    if len(word) > 3 and word[-1] in 'aeo':
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Tokens normalizados (sem acento, sem stopwords, com stemming)"""
+    return [stem(token) for token in TOKEN_RE.findall(fold(text)) if token not in STOPWORDS]
+
+
+def build_document(*texts):
+    """Documento indexável a partir dos campos de texto do estabelecimento"""
+    return ' '.join(token for text in texts for token in tokenize(text))
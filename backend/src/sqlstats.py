@@ -0,0 +1,124 @@
+import itertools
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+
+logger = logging.getLogger('pecanozap.sql')
+_installs = itertools.count(1)
+
+
+class RequestStats:
+    """SQL executado durante uma requisição"""
+
+    __slots__ = ('statements', 'db_time', 'slowest_time', 'slowest_statement')
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement, duration):
+        self.statements += 1
+        self.db_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+class EndpointStats:
+    """Agregados por endpoint: requisições, statements (média/máximo) e tempos de banco e total"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, stats, duration):
+        with self._lock:
+            entry = self._data.get(endpoint)
+            if entry is None:
+                entry = self._data[endpoint] = {
+                    'requests': 0, 'statements': 0, 'max_statements': 0,
+                    'db_time': 0.0, 'max_db_time': 0.0, 'time': 0.0, 'max_time': 0.0
+                }
+            entry['requests'] += 1
+            entry['statements'] += stats.statements
+            entry['max_statements'] = max(entry['max_statements'], stats.statements)
+            entry['db_time'] += stats.db_time
+            entry['max_db_time'] = max(entry['max_db_time'], stats.db_time)
+            entry['time'] += duration
+            entry['max_time'] = max(entry['max_time'], duration)
+
+    def snapshot(self):
+        """Cópia dos agregados com médias, ordenada por statements por requisição"""
+        with self._lock:
+            data = {endpoint: dict(entry) for endpoint, entry in self._data.items()}
+
+        result = {}
+        for endpoint, entry in sorted(data.items(), key=lambda item: -item[1]['statements'] / item[1]['requests']):
+            requests = entry['requests']
+            result[endpoint] = {
+                'requests': requests,
+                'statements_per_request': round(entry['statements'] / requests, 2),
+                'max_statements': entry['max_statements'],
+                'avg_db_ms': round(entry['db_time'] / requests * 1000, 3),
+                'max_db_ms': round(entry['max_db_time'] * 1000, 3),
+                'avg_ms': round(entry['time'] / requests * 1000, 3),
+                'max_ms': round(entry['max_time'] * 1000, 3)
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._data = {}
+
+
+def log_event(event, **fields):
+    """Uma linha JSON por evento (fácil de filtrar no log da plataforma)"""
+    logger.warning(json.dumps(dict(event=event, **fields), ensure_ascii=False, default=str))
+
+
+def server_timing(stats, duration):
+    """Valor do header Server-Timing (db = tempo no banco, app = requisição inteira)"""
+    return (f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statements} queries", '
+            f'app;dur={duration * 1000:.2f}')
+
+
+def install(engine, current_stats, on_statement=None):
+    """Registra before/after_cursor_execute e handle_error no engine (ou na classe Engine, valendo para todos)
+
+    current_stats() devolve o RequestStats da requisição ativa ou None;
+    on_statement(statement, duração) é chamado para cada statement executado,
+    inclusive os que falharam. O início fica no contexto da execução (não na
+    conexão do pool), então um erro não deixa resto para o statement seguinte.
+    """
+    key = f'sqlstats_started_{next(_installs)}'  # um atributo por install: listeners não disputam o início
+
+    def finish(context, statement):
+        started = getattr(context, key, None)
+        if started is None:
+            return
+        setattr(context, key, None)
+        duration = time.perf_counter() - started
+        stats = current_stats()
+        if stats is not None:
+            stats.add(statement, duration)
+        if on_statement:
+            on_statement(statement, duration)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            setattr(context, key, time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        finish(context, statement)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        if exception_context.execution_context is not None and exception_context.statement:
+            finish(exception_context.execution_context, exception_context.statement)
@@ -0,0 +1,116 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenError(Exception):
+    """Token malformado, com assinatura inválida, expirado ou revogado"""
+
+
+def b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+HEADER = b64encode(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode())
+
+
+def subject_key(role, subject):
+    """Chave de revogação de todos os tokens de um usuário (mesmo dict dos jti)"""
+    return f'sub:{role}:{subject}'
+
+
+class TokenSigner:
+    """Tokens de acesso assinados com HMAC-SHA256 (formato JWT/HS256), verificados sem consultar o banco
+
+    As claims decodificadas ficam em um LRU de `cache_size` tokens, então
+    requisições repetidas com o mesmo token não refazem HMAC nem JSON. A
+    revogação é um dict jti -> expiração, consultado em O(1) a cada verificação.
+    Uma entrada subject_key(papel, sub) com expiração E revoga os tokens do
+    usuário emitidos até E - ttl (E cobre o último token que ainda não expirou).
+    """
+
+    def __init__(self, secret, ttl=86400, cache_size=1024):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._key = secret.encode() if isinstance(secret, str) else secret
+        self._cache = OrderedDict()  # token -> claims
+        self._revoked = {}           # jti -> exp
+        self._lock = threading.Lock()
+
+    def issue(self, subject, role, ttl=None, **claims):
+        now = int(time.time())
+        payload = dict(claims, sub=str(subject), role=role, iat=now,
+                       exp=now + (self.ttl if ttl is None else ttl), jti=secrets.token_urlsafe(12))
+        signing_input = HEADER + '.' + b64encode(json.dumps(payload, separators=(',', ':')).encode())
+        return signing_input + '.' + self._sign(signing_input)
+
+    def _sign(self, signing_input):
+        return b64encode(hmac.new(self._key, signing_input.encode(), hashlib.sha256).digest())
+
+    def verify(self, token):
+        """Claims do token; TokenError se inválido, expirado ou revogado"""
+        with self._lock:
+            claims = self._cache.get(token)
+            if claims is not None:
+                self._cache.move_to_end(token)
+
+        if claims is None:
+            claims = self._decode(token)
+            with self._lock:
+                self._cache[token] = claims
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        if claims['exp'] <= time.time():
+            raise TokenError('Token expirado')
+        if claims['jti'] in self._revoked:
+            raise TokenError('Token revogado')
+        subject_revoked = self._revoked.get(subject_key(claims['role'], claims['sub']))
+        if subject_revoked is not None and claims.get('iat', 0) <= subject_revoked - self.ttl:
+            raise TokenError('Token revogado')
+        return claims
+
+    def _decode(self, token):
+        try:
+            header, payload, signature = token.split('.')
+        except (AttributeError, ValueError):
+            raise TokenError('Token inválido')
+        if header != HEADER or not hmac.compare_digest(signature, self._sign(header + '.' + payload)):
+            raise TokenError('Token inválido')
+        try:
+            claims = json.loads(b64decode(payload))
+        except ValueError:
+            raise TokenError('Token inválido')
+        if not isinstance(claims, dict) or not {'sub', 'role', 'exp', 'jti'} <= claims.keys():
+            raise TokenError('Token inválido')
+        return claims
+
+    def revoke(self, jti, exp):
+        """Revoga um token até sua expiração natural (ou, com subject_key, os tokens do usuário)"""
+        with self._lock:
+            self._revoked[jti] = exp
+            self._prune()
+
+    def load_revoked(self, revoked):
+        """Substitui a lista de revogação (iterável de (jti, exp))"""
+        with self._lock:
+            self._revoked = dict(revoked)
+            self._prune()
+
+    def _prune(self):
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[jti]
+
+    def stats(self):
+        with self._lock:
+            return {'cached': len(self._cache), 'cache_size': self.cache_size, 'revoked': len(self._revoked)}
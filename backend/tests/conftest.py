@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+import tempfile
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(TESTS_DIR), 'src')
+
+# main lê DATABASE_URL no import: a suíte usa uma base SQLite própria, descartada no fim
+DATABASE_DIR = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DATABASE_DIR.name, 'test.db')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import main  # noqa: E402
+
+BUSINESSES = 2000
+REVIEWS = 5000
+
+
+def business_records(rng, cities, categories):
+    for n in range(1, BUSINESSES + 1):
+        city, state = rng.choice(cities)
+        yield {
+            'email': f'teste{n}@exemplo.com',
+            'business_name': f'Auto Peças Teste {n}',
+            'owner_name': 'Dono Teste',
+            'city': city,
+            'state': state,
+            'category': rng.choice(categories),
+            'description': 'Peças e acessórios',
+            'latitude': round(-23.4336 + rng.gauss(0, 0.5), 6),
+            'longitude': round(-45.0838 + rng.gauss(0, 0.5), 6)
+        }
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Base migrada com dados iniciais, estabelecimentos e avaliações (com ANALYZE, como em produção)"""
+    rng = random.Random(42)
+    with main.app.app_context():
+        main.upgrade_database()
+        main.create_initial_data()
+        cities = main.db.session.query(main.City.name, main.City.state).all()
+        categories = [name for (name,) in main.db.session.query(main.Category.name)]
+        main.import_businesses(business_records(rng, cities, categories))
+
+        main.db.session.execute(main.Review.__table__.insert(), [{
+            'customer_name': 'Cliente',
+            'rating': rng.randint(1, 5),
+            'is_approved': rng.random() < 0.9,
+            'created_at': main.datetime.datetime.utcnow(),
+            'business_id': rng.randint(1, BUSINESSES)
+        } for _ in range(REVIEWS)])
+        main.rebuild_rating_aggregates()
+        main.mark_changed('reviews')
+        main.db.session.execute(main.db.text('ANALYZE'))
+        main.db.session.commit()
+    yield main.app
+    with main.app.app_context():
+        main.db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    return {'Authorization': f"Bearer {main.token_signer.issue(1, 'admin')}"}
@@ -0,0 +1,57 @@
+import gzip
+
+import pytest
+
+import compression
+import main
+
+PATH = '/api/businesses?per_page=50'
+
+
+def test_accepted_encoding_follows_q_values():
+    assert compression.accepted_encoding('gzip', ('br', 'gzip')) == 'gzip'
+    assert compression.accepted_encoding('gzip;q=0.5, br', ('br', 'gzip')) == 'br'
+    assert compression.accepted_encoding('br;q=0, *', ('br', 'gzip')) == 'gzip'
+    assert compression.accepted_encoding('identity', ('br', 'gzip')) is None
+    assert compression.accepted_encoding(None, ('br', 'gzip')) is None
+
+
+def test_gzip_negotiation(client):
+    plain = client.get(PATH)
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    response = client.get(PATH, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+    assert response.headers['ETag'].startswith('W/')
+
+
+@pytest.mark.skipif(compression.brotli is None, reason='brotli não instalado')
+def test_brotli_preferred_when_accepted(client):
+    plain = client.get(PATH)
+    response = client.get(PATH, headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert compression.brotli.decompress(response.get_data()) == plain.get_data()
+
+
+def test_small_responses_are_not_compressed(client, monkeypatch):
+    monkeypatch.setitem(main.app.config, 'COMPRESS_MIN_SIZE', 10 ** 9)
+    assert 'Content-Encoding' not in client.get(PATH, headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_cached_response_reuses_precompressed_body(client, monkeypatch):
+    main.response_cache.invalidate()
+    first = client.get(PATH, headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+
+    def no_compression(*args, **kwargs):
+        raise AssertionError('resposta em cache comprimida de novo')
+
+    monkeypatch.setattr(compression, 'compress', no_compression)
+    hits = main.response_cache.stats()['hits']
+    second = client.get(PATH, headers={'Accept-Encoding': 'gzip'})
+    assert main.response_cache.stats()['hits'] == hits + 1
+    assert second.headers['Content-Encoding'] == 'gzip'
+    assert second.get_data() == first.get_data()
@@ -0,0 +1,33 @@
+import main
+
+
+def test_etag_revalidation(client):
+    first = client.get('/api/categories')
+    assert first.status_code == 200 and first.headers['ETag']
+    again = client.get('/api/categories', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_failed_version_query_rolls_back_and_serves(app, client, monkeypatch):
+    rollbacks = []
+    rollback = main.db.session.rollback
+
+    def spy():
+        rollbacks.append(True)
+        rollback()
+
+    with app.app_context():
+        main.db.session.execute(main.db.text('ALTER TABLE data_versions RENAME TO data_versions_off'))
+        main.db.session.commit()
+    monkeypatch.setattr(main.db.session, 'rollback', spy)
+    try:
+        response = client.get('/api/reviews/1')
+    finally:
+        monkeypatch.undo()
+        with app.app_context():
+            main.db.session.execute(main.db.text('ALTER TABLE data_versions_off RENAME TO data_versions'))
+            main.db.session.commit()
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert rollbacks
@@ -0,0 +1,30 @@
+import base64
+import json
+
+import pytest
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('sort, values', [
+    ('rating', ['x', 'y']),
+    ('rating', [4.5, '7']),
+    ('rating', [True, 7]),
+    ('recent', ['ontem', 7]),
+    ('recent', [5, 7]),
+    ('', [None]),
+    ('', [1.5]),
+])
+def test_cursor_with_wrong_types_is_rejected(client, sort, values):
+    response = client.get(f'/api/businesses?sort={sort}&cursor={cursor(values)}')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('sort', ['', 'rating', 'recent'])
+def test_cursor_pages_follow_each_other(client, sort):
+    first = client.get(f'/api/businesses?sort={sort}&cursor=&per_page=5&fields=id').get_json()
+    second = client.get(f"/api/businesses?sort={sort}&cursor={first['next_cursor']}&per_page=5&fields=id").get_json()
+    ids = [business['id'] for business in first['businesses'] + second['businesses']]
+    assert len(ids) == 10 and len(set(ids)) == 10
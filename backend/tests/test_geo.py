@@ -0,0 +1,14 @@
+import geo
+
+
+def test_cell_range_ends_at_next_prefix():
+    assert geo.cell_range('6gx') == ('6gx', '6gy')
+    assert geo.cell_range('6gz') == ('6gz', '6h')
+    assert geo.cell_range('6zz') == ('6zz', '7')
+    assert geo.cell_range('zz') == ('zz', None)
+
+
+def test_cell_range_covers_exactly_the_prefix():
+    start, end = geo.cell_range('6gz')
+    for geohash in ('6gz0', '6gzzzzzzz', '6gy', '6h0', '6gzb'):
+        assert (start <= geohash < end) == geohash.startswith('6gz')
@@ -0,0 +1,40 @@
+import importer
+import main
+
+
+def record(email, **extra):
+    return dict({'email': email, 'business_name': 'Importada', 'owner_name': 'Dono',
+                 'city': 'São Paulo', 'state': 'SP', 'category': 'Restaurantes'}, **extra)
+
+
+def test_http_import_hashes_through_password_hasher(app, client, admin_headers, monkeypatch):
+    def no_process_pool(*args, **kwargs):
+        raise AssertionError('pool de processos dentro do servidor web')
+
+    monkeypatch.setattr(importer, 'ProcessPoolExecutor', no_process_pool)
+    records = [record('importada1@exemplo.com', password='segredo123'),
+               record('importada2@exemplo.com', password='segredo456'),
+               record('importada3@exemplo.com')]
+    response = client.post('/api/admin/import/businesses', json=records, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 3
+
+    login = client.post('/api/login', json={'email': 'importada1@exemplo.com', 'password': 'segredo123'})
+    assert login.status_code == 200
+
+
+def test_import_without_password_stores_unusable_hash(app, client):
+    with app.app_context():
+        main.import_businesses([record('semsenha@exemplo.com')])
+        user = main.User.query.filter_by(email='semsenha@exemplo.com').one()
+        assert user.password_hash == importer.UNUSABLE_PASSWORD
+    for password in ('!', 'senha'):
+        response = client.post('/api/login', json={'email': 'semsenha@exemplo.com', 'password': password})
+        assert response.status_code == 401
+
+
+def test_http_import_caps_passwords(app, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'IMPORT_MAX_PASSWORDS', 1)
+    records = [record(f'limite{n}@exemplo.com', password='segredo123') for n in range(2)]
+    response = client.post('/api/admin/import/businesses', json=records, headers=admin_headers)
+    assert response.status_code == 413
@@ -0,0 +1,55 @@
+import threading
+
+import main
+
+BBOX = '-25,-47,-22,-43'
+
+
+def autocomplete_names(client, q):
+    return [item['business_name'] for item in client.get(f'/api/autocomplete?q={q}').get_json()['businesses']]
+
+
+def wait_for_rebuilds():
+    for thread in threading.enumerate():
+        if thread.name.startswith('rebuild-'):
+            thread.join(10)
+
+
+def test_local_write_keeps_indexes_current(app, client, admin_headers):
+    client.get('/api/autocomplete?q=auto')
+    client.get(f'/api/businesses/clusters?bbox={BBOX}')
+
+    response = client.put('/api/admin/users/1', json={'business_name': 'Borracharia Local'}, headers=admin_headers)
+    assert response.status_code == 200
+
+    # A escrita já foi aplicada aos índices: as versões dela contam como vistas e não há reconstrução
+    with app.app_context():
+        assert main._memory_index_state['autocomplete']['versions'] == main.memory_index_versions()
+        assert main._memory_index_state['clusters']['versions'] == main.memory_index_versions(('businesses',))
+    assert autocomplete_names(client, 'borracharia local') == ['Borracharia Local']
+
+
+def test_write_from_another_worker_rebuilds_in_background(app, client, monkeypatch):
+    client.get('/api/autocomplete?q=auto')
+    release = threading.Event()
+    build = main.build_autocomplete_index
+
+    def slow_build():
+        release.wait(10)
+        build()
+
+    monkeypatch.setattr(main, 'build_autocomplete_index', slow_build)
+    with app.app_context():
+        # Como outro worker: grava e incrementa a versão sem tocar nos índices deste
+        main.db.session.get(main.User, 2).business_name = 'Vidraçaria Remota'
+        main.mark_changed('businesses')
+        main.db.session.commit()
+    main.expire_memory_indexes()
+
+    # O índice atual responde enquanto o novo é montado
+    assert autocomplete_names(client, 'vidracaria remota') == []
+    release.set()
+    wait_for_rebuilds()
+    assert autocomplete_names(client, 'vidracaria remota') == ['Vidraçaria Remota']
+    with app.app_context():
+        assert main._memory_index_state['autocomplete']['versions'] == main.memory_index_versions()
@@ -0,0 +1,45 @@
+import re
+
+import main
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? '
+                    r'(-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def test_metrics_exposition_format(client):
+    client.get('/api/categories')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'version=0.0.4' in response.headers['Content-Type']
+
+    text = response.get_data(as_text=True)
+    assert text.endswith('\n')
+    typed = {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            typed[name] = kind
+        elif not line.startswith('# HELP '):
+            assert SAMPLE.match(line), line
+
+    assert typed['http_requests_total'] == 'counter'
+    assert typed['db_pool_wait_seconds'] == 'histogram'
+    assert typed['db_pool_hold_seconds'] == 'histogram'
+    assert typed['db_pool_size'] == 'gauge'
+    assert 'http_requests_total{endpoint="get_categories",method="GET",status="200"}' in text
+    assert re.search(r'^db_pool_wait_seconds_bucket\{le="\+Inf"\} [1-9]', text, re.M)
+    assert re.search(r'^db_pool_size \d+$', text, re.M)
+
+
+def test_pool_state_uses_configured_overflow(app):
+    state = main.pool_state()
+    assert state['size'] == app.config['DATABASE_POOL_SIZE']
+    assert state['max_overflow'] == app.config['DATABASE_MAX_OVERFLOW']
+    assert not state['exhausted']
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setitem(main.app.config, 'METRICS_TOKEN', 'segredo')
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
@@ -0,0 +1,19 @@
+import os
+
+from sqlalchemy import create_engine, inspect
+
+import migrations
+
+
+def test_pending_migrations_is_read_only(tmp_path):
+    engine = create_engine('sqlite:///' + os.path.join(tmp_path, 'empty.db'))
+    assert migrations.pending_migrations(engine) == [
+        (version, description) for version, description, _ in migrations.MIGRATIONS
+    ]
+    assert not inspect(engine).has_table('schema_migrations')
+    engine.dispose()
+
+
+def test_diagnostics_report_no_pending_migrations(client):
+    body = client.get('/api/test-db').get_json()
+    assert body['migrations_pending'] == []
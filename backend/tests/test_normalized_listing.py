@@ -0,0 +1,20 @@
+import main
+
+
+def test_city_missing_from_reference_cache_is_loaded(app, client):
+    client.get('/api/cities')  # reference_cache deste worker sem a cidade nova
+    with app.app_context():
+        # Como outro worker cuja escrita ainda não chegou a esta versão: cidade nova sem mark_changed
+        city = main.City(name='Cidade Nova', state='SP')
+        main.db.session.add(city)
+        main.db.session.flush()
+        main.db.session.get(main.User, 3).city_id = city.id
+        main.db.session.commit()
+        city_id = city.id
+
+    main.response_cache.invalidate()
+    response = client.get(f'/api/businesses?city_id={city_id}&format=normalized')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [business['city_id'] for business in body['businesses']] == [city_id]
+    assert body['cities'][str(city_id)]['name'] == 'Cidade Nova'
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+import main
+from passwords import PasswordHasher, PoolBusy
+
+
+def test_full_queue_rejects_immediately():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, max_queue=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow(*args):
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=hasher._run, args=(slow,))
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(PoolBusy):
+            hasher.hash('segredo')
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.verify(hasher.hash('segredo'), 'segredo')
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/api/login', {'email': 'teste1@exemplo.com', 'password': 'segredo'}),
+    ('/api/register', {'email': 'novo@exemplo.com', 'password': 'segredo123', 'business_name': 'Novo',
+                       'owner_name': 'Dono', 'city_id': 1, 'category_id': 1}),
+])
+def test_pool_busy_is_503_with_retry_after(client, monkeypatch, path, payload):
+    def busy(*args):
+        raise PoolBusy()
+
+    monkeypatch.setattr(main.password_hasher, '_run', busy)
+    response = client.post(path, json=payload)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
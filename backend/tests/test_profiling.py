@@ -0,0 +1,61 @@
+import pstats
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clean_profiles(client, admin_headers):
+    client.delete('/api/admin/profile', headers=admin_headers)
+    yield
+    client.delete('/api/admin/profile', headers=admin_headers)
+
+
+def arm(client, admin_headers, **options):
+    response = client.post('/api/admin/profile', json=dict(endpoint='get_businesses', **options), headers=admin_headers)
+    assert response.status_code == 200
+
+
+def only_result(client, admin_headers):
+    listing = client.get('/api/admin/profile', headers=admin_headers).get_json()
+    assert listing['armed'] == {}
+    (result,) = listing['results']
+    assert result['endpoint'] == 'get_businesses' and result['status'] == 200
+    return result
+
+
+def test_cprofile_result_downloads_as_pstats(client, admin_headers, tmp_path):
+    arm(client, admin_headers)
+    client.get('/api/businesses')
+    client.get('/api/businesses')  # desarmado depois da primeira
+    result = only_result(client, admin_headers)
+
+    summary = client.get(f"/api/admin/profile/{result['id']}", headers=admin_headers).get_json()
+    assert 'get_businesses' in summary['summary']
+
+    response = client.get(f"/api/admin/profile/{result['id']}?format=pstats", headers=admin_headers)
+    assert response.status_code == 200
+    path = tmp_path / 'profile.prof'
+    path.write_bytes(response.get_data())
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert 'get_businesses' in functions
+
+    collapsed = client.get(f"/api/admin/profile/{result['id']}?format=collapsed", headers=admin_headers)
+    assert collapsed.status_code == 400
+
+
+def test_sample_result_downloads_as_collapsed_stacks(client, admin_headers):
+    arm(client, admin_headers, mode='sample', interval_ms=1)
+    client.get('/api/businesses?per_page=50')
+    result = only_result(client, admin_headers)
+    response = client.get(f"/api/admin/profile/{result['id']}?format=collapsed", headers=admin_headers)
+    assert response.status_code == 200
+    for line in response.get_data(as_text=True).splitlines():
+        stack, _, count = line.rpartition(' ')
+        assert stack and int(count) > 0
+
+
+def test_arm_validates_input(client, admin_headers):
+    for payload in ({'endpoint': 'nao_existe'}, {'endpoint': 'get_businesses', 'count': 0},
+                    {'endpoint': 'get_businesses', 'mode': 'outro'}):
+        assert client.post('/api/admin/profile', json=payload, headers=admin_headers).status_code == 400
+    assert client.post('/api/admin/profile', json={'endpoint': 'get_businesses'}).status_code == 401
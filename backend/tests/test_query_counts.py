@@ -0,0 +1,47 @@
+"""Statements SQL por requisição, contados pelos listeners de sqlstats (o mesmo número do Server-Timing)
+
+Cada rota tem um teto fixo, independente do tamanho da página: um N+1 na
+serialização (city/category/rating por linha) estoura o limite.
+"""
+import pytest
+
+import main
+
+
+def statement_count(client, path):
+    main.response_cache.invalidate()  # sem o cache de resposta, que serviria a página sem ir ao banco
+    main.endpoint_stats.reset()
+    response = client.get(path)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    (stats,) = main.endpoint_stats.snapshot().values()
+    return stats['max_statements']
+
+
+@pytest.mark.parametrize('path', [
+    '/api/businesses',
+    '/api/businesses?per_page=50',
+    '/api/businesses?city_id=1&category_id=1',
+    '/api/businesses?sort=rating&per_page=50',
+])
+def test_listing(client, path):
+    # data_versions (ETag), COUNT e a página com city/category no mesmo SELECT
+    assert statement_count(client, path) <= 3
+
+
+@pytest.mark.parametrize('path', [
+    '/api/businesses?search=auto%20pecas',
+    '/api/businesses?search=teste&per_page=50',
+])
+def test_search(client, path):
+    # Como a listagem, mais a detecção do backend de busca na primeira consulta do processo
+    assert statement_count(client, path) <= 4
+
+
+def test_detail(client):
+    assert statement_count(client, '/api/businesses/5') <= 2
+
+
+@pytest.mark.parametrize('path', ['/api/categories', '/api/cities'])
+def test_reference_lists(client, path):
+    statement_count(client, path)  # carrega o reference_cache deste worker
+    assert statement_count(client, path) <= 1
@@ -0,0 +1,12 @@
+import main
+
+
+def test_hot_queries_use_their_indexes(app):
+    """Mesmo critério do `flask --app main db-explain`: cada consulta quente usa o seu índice, sem ordenar em memória"""
+    failures = []
+    with app.app_context():
+        for description, index_name, query in main.hot_queries():
+            ok, plan = main.check_query_plan(index_name, query)
+            if not ok:
+                failures.append(f"{description} ({index_name}):\n    " + '\n    '.join(plan))
+    assert not failures, '\n'.join(failures)
@@ -0,0 +1,23 @@
+import pytest
+
+
+def total(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.get_json()['total']
+
+
+@pytest.mark.parametrize('search', ['de', 'e', '---', 'de e da'])
+def test_search_without_terms_matches_nothing(client, search):
+    assert total(client, f'/api/businesses?search={search}') == 0
+
+
+def test_search_filters_by_terms(client):
+    matched = total(client, '/api/businesses?search=teste%201999')
+    assert 0 < matched < total(client, '/api/businesses')
+
+
+def test_admin_search_without_terms_still_matches_email(client, admin_headers):
+    response = client.get('/api/admin/users?search=e', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.get_json()['total'] > 0
@@ -0,0 +1,30 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+import sqlstats
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    yield engine
+    engine.dispose()
+
+
+def test_failed_statement_is_recorded_and_leaves_nothing_behind(engine):
+    stats = sqlstats.RequestStats()
+    timed = []
+    sqlstats.install(engine, lambda: stats, lambda statement, duration: timed.append((statement, duration)))
+
+    with engine.connect() as conn:
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text('SELECT * FROM tabela_inexistente'))
+        time.sleep(0.05)
+        conn.execute(text('SELECT 1'))
+        assert not any(key for key in conn.info if 'started' in key)
+
+    assert stats.statements == 2
+    assert [statement for statement, _ in timed] == ['SELECT * FROM tabela_inexistente', 'SELECT 1']
+    assert timed[1][1] < 0.05  # a espera entre os dois não conta para o statement seguinte
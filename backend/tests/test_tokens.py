@@ -0,0 +1,74 @@
+import pytest
+
+import main
+from tokens import TokenError, TokenSigner
+
+
+def business_headers(user_id):
+    return {'Authorization': f"Bearer {main.token_signer.issue(user_id, 'business')}"}
+
+
+def test_issue_and_verify():
+    signer = TokenSigner('segredo', ttl=60)
+    claims = signer.verify(signer.issue(7, 'business'))
+    assert claims['sub'] == '7' and claims['role'] == 'business'
+    assert claims['exp'] - claims['iat'] == 60
+
+
+@pytest.mark.parametrize('tamper', [
+    lambda token: token[:-2] + ('AA' if not token.endswith('AA') else 'BB'),
+    lambda token: TokenSigner('outro segredo').issue(7, 'admin'),
+    lambda token: 'nao-e-um-token',
+])
+def test_invalid_tokens_are_rejected(tamper):
+    signer = TokenSigner('segredo')
+    with pytest.raises(TokenError):
+        signer.verify(tamper(signer.issue(7, 'business')))
+
+
+def test_expired_token_is_rejected(client):
+    signer = TokenSigner('segredo')
+    with pytest.raises(TokenError, match='expirado'):
+        signer.verify(signer.issue(7, 'business', ttl=-1))
+
+    expired = main.token_signer.issue(11, 'business', ttl=-1)
+    assert client.put('/api/profile', json={}, headers={'Authorization': f'Bearer {expired}'}).status_code == 401
+
+
+def test_logout_revokes_the_token(app, client):
+    headers = business_headers(11)
+    other = business_headers(11)
+    assert client.put('/api/profile', json={}, headers=headers).status_code == 200
+    assert client.post('/api/logout', headers=headers).status_code == 200
+    assert client.put('/api/profile', json={}, headers=headers).status_code == 401
+
+    # Outro worker: a revogação vem de revoked_tokens; só o token do logout é afetado
+    with app.app_context():
+        main.token_signer.load_revoked([])
+        main.load_revoked_tokens()
+    assert client.put('/api/profile', json={}, headers=headers).status_code == 401
+    assert client.put('/api/profile', json={}, headers=other).status_code == 200
+
+
+def test_missing_token_or_wrong_role(client):
+    assert client.put('/api/profile', json={}).status_code == 401
+    assert client.get('/api/admin/users', headers=business_headers(11)).status_code == 403
+
+
+def test_deactivation_revokes_issued_tokens(app, client, admin_headers):
+    headers = business_headers(10)
+    assert client.put('/api/profile', json={}, headers=headers).status_code == 200
+
+    response = client.put('/api/admin/users/10', json={'is_active': False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.put('/api/profile', json={}, headers=headers).status_code == 401
+
+    # Outro worker recebe a revogação pela tabela revoked_tokens
+    with app.app_context():
+        main.token_signer.load_revoked([])
+        main.load_revoked_tokens()
+    assert client.put('/api/profile', json={}, headers=headers).status_code == 401
+    # Tokens de admin com o mesmo sub não são afetados
+    assert client.get('/api/admin/users?per_page=1', headers={
+        'Authorization': f"Bearer {main.token_signer.issue(10, 'admin')}"
+    }).status_code == 200
@@ -23,6 +23,9 @@ export const apiService = {
   // Estabelecimentos
   getBusinesses: (params = {}) => api.get('/businesses', { params }),
   getBusiness: (id) => api.get(`/businesses/${id}`),
+  autocomplete: (q, limit = 5) => api.get('/autocomplete', { params: { q, limit } }),
+  getNearbyBusinesses: (lat, lng, distance = 5) => api.get('/businesses/nearby', { params: { lat, lng, distance } }),
+  getBusinessClusters: (bbox, zoom) => api.get('/businesses/clusters', { params: { bbox: bbox.join(','), zoom } }),
   
   // Autenticação
   register: (data) => api.post('/register', data),
@@ -36,6 +39,12 @@ export const apiService = {
   testDatabase: () => api.get('/test-db'),
 }
 
+// Campos usados pelo BusinessCard e pelos destaques da HomePage (?fields= reduz a consulta e o payload)
+export const BUSINESS_CARD_FIELDS = 'id,business_name,description,phone,whatsapp,city,category,rating,review_count'
+
+// A listagem da BusinessesPage também mostra endereço, proprietário e "Desde ..."
+export const BUSINESS_LIST_FIELDS = `${BUSINESS_CARD_FIELDS},address,owner_name,created_at`
+
 // Funções auxiliares
 export const formatWhatsAppUrl = (phone, businessName, message = '') => {
   const cleanPhone = phone.replace(/\D/g, '')
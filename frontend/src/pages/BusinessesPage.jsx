@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { apiService, formatWhatsAppUrl } from '../lib/api'
+import { apiService, formatWhatsAppUrl, BUSINESS_LIST_FIELDS } from '../lib/api'
 
 function BusinessesPage({ onNavigate }) {
   const [businesses, setBusinesses] = useState([])
@@ -36,7 +36,7 @@ function BusinessesPage({ onNavigate }) {
   const loadBusinesses = async () => {
     setLoading(true)
     try {
-      const params = {}
+      const params = { fields: BUSINESS_LIST_FIELDS }
       if (filters.category_id) params.category_id = filters.category_id
       if (filters.city_id) params.city_id = filters.city_id
       if (filters.search) params.search = filters.search
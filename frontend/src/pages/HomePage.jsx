@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react'
-import { apiService, formatWhatsAppUrl } from '../lib/api'
+import { apiService, formatWhatsAppUrl, BUSINESS_CARD_FIELDS } from '../lib/api'
 
 function HomePage({ onNavigate }) {
   const [categories, setCategories] = useState([])
@@ -14,7 +14,7 @@ function HomePage({ onNavigate }) {
     try {
       const [categoriesRes, businessesRes] = await Promise.all([
         apiService.getCategories(),
-        apiService.getBusinesses({ per_page: 6 })
+        apiService.getBusinesses({ per_page: 6, fields: BUSINESS_CARD_FIELDS })
       ])
       
       setCategories(categoriesRes.data)